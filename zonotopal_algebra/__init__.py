@@ -1,3 +1,4 @@
+from .disk_cache import DiskCache, set_disk_cache
 from .zonotopal_algebra import ZonotopalAlgebra, zon_spaces, print_zon_info
 
 version_info = (1, 0, 1)
@@ -7,4 +8,6 @@ __all__ = [
     "ZonotopalAlgebra",
     "zon_spaces",
     "print_zon_info",
+    "DiskCache",
+    "set_disk_cache",
 ]
@@ -1,14 +1,62 @@
+from hashlib import sha256
+
+from sage.arith.misc import gcd
+from sage.arith.misc import lcm
+from sage.matrix.constructor import Matrix
 from sage.matroids.constructor import Matroid
+from sage.misc.cachefunc import cached_method
 from sage.modules.free_module import VectorSpace
 from sage.rings.ideal import Ideal
 from sage.rings.polynomial.polynomial_ring_constructor import PolynomialRing
+from sage.rings.rational_field import QQ
 
 from .ordered_matroid import OrderedMatroid
-from .poly_free_module import PolynomialFreeModule
+from .poly_free_module import LightPolynomialFreeModule
+from .poly_utils import LinearFormProducts
+from .poly_utils import diff_bilinear_gram_matrix
+
+
+def _primitive_vector(v):
+    r"""
+    Return a canonical nonzero multiple of the vector ``v``, which over `\QQ`
+    is the primitive integer vector whose first nonzero entry is positive,
+    and over other fields is the vector whose first nonzero entry is one.
+    """
+    lead = next(c for c in v if c)
+    if v.base_ring() == QQ:
+        denom = lcm([c.denominator() for c in v])
+        v = denom * v
+        g = gcd([c.numerator() for c in v])
+        return v / (g if lead > 0 else -g)
+    return v / lead
+
+
+def _canonical_data(a):
+    r"""
+    Return a representation of a constructor argument by builtin types,
+    where matrices are given by their base ring, dimensions and entries.
+    """
+    if hasattr(a, "nrows"):
+        return (str(a.base_ring()), a.nrows(), a.ncols(),
+                tuple(str(c) for c in a.list()))
+    return a
+
+
+def _ignore_workers(self, workers=None, *args, **kwds):
+    r"""
+    Cache key for methods whose ``workers`` argument only selects the number
+    of processes computing a result.  The other arguments are part of the
+    key, so that a call with a new ``checkpoint`` is not served from the cache
+    without writing its checkpoint.
+    """
+    return (args, tuple(sorted(kwds.items())))
 
 
 class AbstractZonotopalAlgebra:
     def __init__(self, X, varNames="x"):
+        # whether the methods decorated with ``disk_cached`` use the cache
+        self._use_disk_cache = True
+        self._input_matrix = X
         self._F = X.base_ring()
         self._M = Matroid(matrix=X)
         self._OM = OrderedMatroid(self._M, reverse=True)
@@ -26,6 +74,27 @@ class AbstractZonotopalAlgebra:
     def matrix(self):
         return self._X
 
+    def _constructor_data(self):
+        r"""
+        Return the class, arguments and keyword arguments from which a copy of
+        this zonotopal algebra can be constructed, for instance in a worker
+        process as in ``parallel.parallel_chunks``.
+        """
+        return (type(self), (self._input_matrix,),
+                {"varNames": self.polynomial_ring().variable_names()})
+
+    def _fingerprint(self):
+        r"""
+        Return a hexadecimal digest identifying this zonotopal algebra by its
+        class, matrices, base field and variable names, which is stable
+        across sessions.
+        """
+        cls, args, kwds = self._constructor_data()
+        data = (cls.__name__,
+                [_canonical_data(a) for a in args],
+                sorted((k, _canonical_data(v)) for (k, v) in kwds.items()))
+        return sha256(repr(data).encode()).hexdigest()
+
     def _vector_space(self):
         return self._V
 
@@ -35,11 +104,84 @@ class AbstractZonotopalAlgebra:
     def _ordered_matroid(self):
         return self._OM
 
+    @cached_method
+    def _linear_form_products(self):
+        r"""
+        Return the shared memoized products of linear forms of the columns of
+        the matrix, as in ``poly_utils.LinearFormProducts``.
+        """
+        return LinearFormProducts(self.polynomial_ring(),
+                                  self.matrix().columns())
+
+    @cached_method
+    def _hyperplane_normals(self):
+        r"""
+        Return the hyperplanes of the underlying matroid together with their
+        normal vectors in the column space of the matrix.
+
+        The columns of the matrix are expressed once in terms of a basis
+        `B_0` of the matroid, with coordinates `y_e`.  A vector `X_{B_0} c`
+        of the column space is orthogonal to a column `X_{B_0} y_e` exactly
+        when `y_e^T G c = 0`, where `G` is the Gram matrix of `X_{B_0}`.  The
+        normal of a hyperplane is therefore obtained from the one-dimensional
+        kernel of the products of the coordinates of its elements with `G`,
+        and normals over `\QQ` are scaled to primitive integer vectors.  A
+        ``ValueError`` is raised as in ``self._hyperplane_normal`` if some
+        hyperplane has no normal.
+
+        OUTPUT:
+
+        A list of pairs ``(H, eta)``, where ``H`` ranges over the hyperplanes
+        of the matroid and ``eta`` is a nonzero vector in the column space of
+        the matrix which is orthogonal to the span of ``H``.
+        """
+        F = self.base_field()
+        X = self.matrix()
+        M = self._matroid()
+        r = M.rank()
+        # coordinates of the columns in terms of a basis of the matroid
+        X_B0 = X.matrix_from_columns(sorted(M.basis()))
+        Y = X_B0.solve_right(X)
+        G = X_B0.transpose() * X_B0
+
+        normals = []
+        for H in M.hyperplanes():
+            A = Matrix(F, len(H), r, [list(Y.column(e)) for e in H])
+            outside = min(M.groundset() - H)
+            c = self._flat_normal_coefficients(A * G, G * Y.column(outside))
+            normals.append((H, _primitive_vector(X_B0 * c)))
+        return normals
+
+    def _flat_normal_coefficients(self, A, w):
+        r"""
+        Return the coefficients of the normal of a flat in a flat of rank one
+        higher, as the vector spanning the right kernel of ``A``.
+
+        The rows of ``A`` pair the coefficients with the elements of the
+        smaller flat, and ``w`` pairs them with an element of the larger flat
+        outside of it.  A ``ValueError`` is raised unless the kernel is
+        one-dimensional and its vector pairs nontrivially with ``w``, since
+        otherwise the normal is isotropic, or the flats are degenerate.
+        """
+        K = A.right_kernel_matrix()
+        if K.nrows() != 1 or K.row(0) * w == 0:
+            raise ValueError(
+                "AbstractZonotopalAlgebra: hyperplane normal is isotropic "
+                "over %s" % self.base_field())
+        return K.row(0)
+
     def _hyperplane_normal(self, F, E=None):
         r"""
         Return a hyperplane normal of a flat F in another flat E of rank one
         higher.
 
+        The normal is computed from the kernel of the products of the columns
+        of ``F`` with a basis of the span of ``E``, which is valid over any
+        field.  Over fields where the span of ``F`` meets its orthogonal
+        complement within the span of ``E``, such as finite fields of some
+        characteristics, no such normal exists and a ``ValueError`` is
+        raised.
+
         INPUT:
 
         - ``F`` -- a flat of the underlying matroid.
@@ -51,37 +193,22 @@ class AbstractZonotopalAlgebra:
         OUTPUT:
 
         A nonzero vector in the span of ``E`` which is orthogonal to the span
-        of ``F``.
+        of ``F``, and not in the span of ``F``.
         """
-        X, V = self.matrix(), self._vector_space()
-
-        F_subspace = V.subspace([X.column(x) for x in F])
-
+        X, M = self.matrix(), self._matroid()
         if E is None:
-            E = self._matroid().groundset()
-            # return F_subspace.complement().basis()[0]
-        E_subspace = V.subspace([X.column(x) for x in E])
-
-        # Workaround needed for bug similar to the one reported at:
-        # https://trac.sagemath.org/ticket/32447
-        # Supposedly should be fixed in Sage 9.5
-        #
-        # Original code:
-        # return F_subspace.complement().intersection(E_subspace).basis()[0]
-
-        external_vec = None
-        for x in E:
-            if X.column(x) not in F_subspace:
-                external_vec = X.column(x)
-                break
-        basis = F_subspace.basis()
-        for b in basis:
-            external_vec -= \
-                (b.inner_product(external_vec) / b.inner_product(b)) * b
-
-        return external_vec
-
+            E = M.groundset()
+        B_F = sorted(M.max_independent(F))
+        B_E = B_F + sorted(M.max_independent(E) - M.closure(B_F))[:1]
+        X_F = X.matrix_from_columns(B_F)
+        X_E = X.matrix_from_columns(B_E)
 
+        # coefficients c of the vectors X_E c orthogonal to the span of F,
+        # paired with the last column of X_E, which lies outside of F
+        x = X_E.column(len(B_E) - 1)
+        c = self._flat_normal_coefficients(X_F.transpose() * X_E,
+                                           X_E.transpose() * x)
+        return X_E * c
 
     def I_ideal(self):
         return Ideal(self.I_ideal_gens())
@@ -96,15 +223,53 @@ class AbstractZonotopalAlgebra:
         raise NotImplementedError
 
     def P_space(self):
-        return PolynomialFreeModule(self.polynomial_ring(),
-                                    basis=tuple(self.P_space_basis()))
+        return LightPolynomialFreeModule(
+            self.polynomial_ring(), basis=tuple(self.P_space_basis().values()))
 
     def P_space_basis(self):
         raise NotImplementedError
 
     def D_space(self):
-        raise PolynomialFreeModule(self.polynomial_ring(),
-                                   basis=tuple(self.D_space_basis()))
+        return LightPolynomialFreeModule(
+            self.polynomial_ring(), basis=tuple(self.D_space_basis().values()))
 
     def D_space_basis(self):
         raise NotImplementedError
+
+    def duality_matrix(self):
+        r"""
+        Return the matrix of differential bilinear forms between the P-space
+        basis and the D-space basis.
+
+        The bases are indexed by the same keys, and are dual to each other
+        exactly when this matrix is the identity.  The matrix is computed as
+        a single sparse matrix product over a shared monomial index, rather
+        than by evaluating the bilinear form on each pair separately.
+
+        OUTPUT:
+
+        A pair ``(keys, G)``, where ``keys`` is a list of the keys of the
+        P-space and D-space bases, and ``G`` is the matrix whose ``(i, j)``
+        entry is the differential bilinear form of the P-space polynomial
+        of ``keys[i]`` with the D-space polynomial of ``keys[j]``.
+
+        EXAMPLES::
+
+            sage: X = Matrix(QQ, [[1, 0], [0, 1], [1, 1]]).transpose()
+            sage: Z = ZonotopalAlgebra(X, variant="central", varNames="xy")
+            sage: keys, G = Z.duality_matrix()
+            sage: len(keys)
+            3
+            sage: G.is_one()
+            True
+        """
+        P_basis = self.P_space_basis()
+        D_basis = self.D_space_basis()
+        keys = list(P_basis)
+        if set(keys) != set(D_basis):
+            raise ValueError("P-space and D-space bases are not indexed by "
+                             "the same keys")
+        G = diff_bilinear_gram_matrix(self.polynomial_ring(),
+                                      [P_basis[k] for k in keys],
+                                      [D_basis[k] for k in keys])
+        return (keys, G)
@@ -1,12 +1,25 @@
 from itertools import chain
+from sage.arith.misc import previous_prime
 from sage.misc.cachefunc import cached_method
+from sage.rings.finite_rings.finite_field_constructor import GF
+from sage.rings.rational_field import QQ
 
 from .abstract_zonotopal_algebra import AbstractZonotopalAlgebra
+from .abstract_zonotopal_algebra import _ignore_workers
+from .checkpoint import Checkpointer
+from .checkpoint import load_checkpoint
+from .disk_cache import disk_cached
+from .graded_poly import HomogeneousPolynomial
+from .modular import reconstruct_basis
+from .modular import residue_signature
+from .parallel import parallel_chunks
+from .parallel import worker_pool
+from .poly_utils import _exponent_items
 from .poly_utils import diff_bilinear_form
-from .poly_utils import linear_form
-from .poly_utils import poly_deriv
-from .poly_utils import pure_tensor
-from .poly_free_module import PolynomialFreeModule
+from .poly_utils import diff_bilinear_gram_matrix
+from .poly_utils import linear_form_power
+from .poly_utils import poly_deriv_many
+from .poly_span import PolynomialSpan
 
 
 class CentralZonotopalAlgebra(AbstractZonotopalAlgebra):
@@ -18,53 +31,79 @@ class CentralZonotopalAlgebra(AbstractZonotopalAlgebra):
             + " with matrix\n" + str(self.matrix())
 
     @cached_method
+    @disk_cached
     def I_ideal_gens(self):
         gens = []
         P = self.polynomial_ring()
         n = self._matroid().size()
-        for H in self._matroid().hyperplanes():
-            normal = self._hyperplane_normal(H)
-            gen = linear_form(P, normal)**(n - len(H))
+        for (H, normal) in self._hyperplane_normals():
+            gen = linear_form_power(P, normal, n - len(H))
             gens.append(gen)
         return gens
 
-    @cached_method
-    def J_ideal_gens(self):
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def J_ideal_gens(self, workers=None):
+        r"""
+        Return the generators of the central J-ideal.
+
+        INPUT:
+
+        - ``workers`` -- (default: ``None``) if an integer greater than one,
+          the number of processes among which the cocircuits are distributed
+        """
+        cocircuits = self._matroid().cocircuits()
+        if workers is not None and workers > 1:
+            return parallel_chunks(self, "_J_ideal_gens_chunk", cocircuits,
+                                   workers)
+        return self._J_ideal_gens_chunk(cocircuits)
+
+    def _J_ideal_gens_chunk(self, cocircuits):
         gens = []
-        P = self.polynomial_ring()
-        X_cols = self.matrix().columns()
-        for cocirc in self._matroid().cocircuits():
-            gen = pure_tensor(P, X_cols, cocirc)
+        products = self._linear_form_products()
+        for cocirc in cocircuits:
+            gen = products(cocirc)
             gens.append(gen)
         return gens
 
-    @cached_method
-    def P_space_basis(self):
-        basis = {}
-        P = self.polynomial_ring()
-        M = self._ordered_matroid()
-        X_cols = self.matrix().columns()
-        for B in M.bases():
-            ext_passive = M.passive_elements(B) - B
-            elt = pure_tensor(P, X_cols, ext_passive)
-            basis[B] = elt
-        return basis
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def P_space_basis(self, workers=None):
+        r"""
+        Return the central P-space basis, indexed by the bases of the matroid.
 
-    @cached_method
-    def D_space_basis(self):
-        basis = {}
-        P = self.polynomial_ring()
+        INPUT:
+
+        - ``workers`` -- (default: ``None``) if an integer greater than one,
+          the number of processes among which the bases are distributed
+        """
         M = self._ordered_matroid()
-        ord_groundset = M.groundset_order()
-        # handle ordering convention in OrderedMatroid class
-        ord_groundset.reverse()
+        # both branches consume the same stream of activities, so that the
+        # keys of the basis are in the same order
+        ext_passives = ((B, passive - B)
+                        for (B, _, passive) in M.all_activities("bases"))
+        if workers is not None and workers > 1:
+            elts = parallel_chunks(self, "_P_space_basis_chunk",
+                                   ext_passives, workers)
+        else:
+            elts = self._P_space_basis_chunk(ext_passives)
+        return dict(elts)
 
-        def gs_key(x):
-            return M.size() - M._gs_key(x)
+    def _P_space_basis_chunk(self, ext_passives):
+        products = self._linear_form_products()
+        return [(B, products(ext_passive))
+                for (B, ext_passive) in ext_passives]
 
+    @cached_method
+    def _D_space_context(self):
+        r"""
+        Return the external order on the independent sets and the dominant
+        bases of the flats, which are shared by all steps of the D-space
+        recursion.
+        """
+        M = self._ordered_matroid()
         ext_ord = M.external_order(variant='convex geometry',
                                    representation='independent')
-        X_cols = self.matrix().columns()
 
         # Cache dominant bases of each flat
         # empty flat
@@ -75,73 +114,303 @@ class CentralZonotopalAlgebra(AbstractZonotopalAlgebra):
             *[M.flats(i) for i in range(1, M.rank() + 1)])
         for F in nonempty_flats:
             dom_bases[F] = M._dominant_basis(F)
+        return (ext_ord, dom_bases)
+
+    def _D_space_interval(self, I0, F0):
+        r"""
+        Return the independent sets other than ``I0`` in the interval of the
+        external order from ``I0`` to the dominant basis of its closure
+        ``F0``, against which the extensions of ``I0`` are projected.
+        """
+        ext_ord, dom_bases = self._D_space_context()
+        poly_indices = ext_ord.closed_interval(I0, dom_bases[F0])
+        poly_indices.remove(I0)
+        return poly_indices
+
+    def _D_space_extension(self, I0, x, F0, F, basis):
+        r"""
+        Return the polynomial of the D-space recursion for the independent
+        set ``I0 + x``.
+
+        INPUT:
+
+        - ``I0`` -- an independent set whose elements all precede ``x``
+        - ``x`` -- an element outside the closure ``F0`` of ``I0``
+        - ``F0``, ``F`` -- the closures of ``I0`` and ``I0 + x``
+        - ``basis`` -- a dictionary containing the recursion polynomials of
+          ``I0`` and of the independent sets of ``_D_space_interval(I0, F0)``
+        """
+        P = self.polynomial_ring()
+        M = self._ordered_matroid()
+        X = self.matrix()
+
+        def gs_key(x):
+            return M.size() - M._gs_key(x)
+
+        # identify starting D-space polynomial
+        d0 = basis[I0]
+
+        # identify J-generator for differentiation, whose differential
+        # operator is the composition of the derivatives along its columns
+        # note for comparisons that the reverse order is used for notation
+        cocirc = frozenset(
+            filter(lambda c: gs_key(c) <= gs_key(x), F - F0)
+        )
+        J_vecs = [X.column(c) for c in cocirc]
+
+        # compute orthogonal vector of the linear form p_eta
+        orthog_vec = self._hyperplane_normal(F0, F)
+
+        # extend d0 by power of orthogonal vector
+        d = d0.mul_linear_form_power(orthog_vec, len(J_vecs) - 1)
+
+        # compute derivative of d1 by J_gen
+        d_deriv = d.derivative_product(J_vecs)
+
+        # only project if this derivative is nonzero
+        if not d_deriv:
+            return d
+
+        # construct polynomial vector space for projection
+        poly_indices = self._D_space_interval(I0, F0)
+        polys = [basis[J].mul_linear_form_power(
+                     orthog_vec, d.degree() - basis[J].degree())
+                 for J in poly_indices]
+        poly_derivs = [poly.derivative_product(J_vecs) for poly in polys]
+        span = PolynomialSpan(P, poly_derivs)
+
+        # decompose d derivative in this polynomial vector space
+        decomposition = span.coefficients(d_deriv)
+        return d.subtract_multiples(decomposition, polys)
+
+    def _D_space_extension_chunk(self, tasks):
+        return [self._D_space_extension(*task) for task in tasks]
+
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def D_space_basis(self, workers=None, checkpoint=None,
+                      algorithm="recursive"):
+        r"""
+        Return the central D-space basis, indexed by the bases of the
+        matroid.
+
+        INPUT:
+
+        - ``workers`` -- (default: ``None``) if an integer greater than one,
+          the number of processes among which the extensions by each ground
+          set element, or the primes of the modular algorithm, are
+          distributed
+
+        - ``checkpoint`` -- (default: ``None``) a file name.  If given, the
+          polynomials of the recursion are saved to this file between the
+          steps for the ground set elements, at most once per
+          ``CHECKPOINT_INTERVAL`` seconds and after the last step.  A
+          computation for the same matrix resumes from the file if it
+          exists.  No checkpoint is written if the basis is found in the
+          cache of ``set_disk_cache``.
+
+        - ``algorithm`` -- (default: ``"recursive"``) either ``"recursive"``,
+          to run the recursion over the base field, or ``"modular"``, to run
+          it modulo several primes and reconstruct the rational coefficients,
+          which avoids the growth of intermediate coefficients over `\QQ`,
+          and which cannot be combined with a ``checkpoint``
+
+        EXAMPLES:
+
+            sage: X = Matrix(QQ, [[1, 0, 1, 1], [0, 1, 1, 2]])
+            sage: Z = CentralZonotopalAlgebra(X, varNames="xy")
+            sage: basis = Z.D_space_basis()
+            sage: len(basis)
+            6
+            sage: Z.D_space_basis(algorithm="modular") == basis
+            True
+        """
+        if algorithm == "modular":
+            if checkpoint is not None:
+                raise ValueError("CentralZonotopalAlgebra: the modular "
+                                 "algorithm does not support checkpoints")
+            return self._D_space_basis_modular(workers)
+        if algorithm != "recursive":
+            raise ValueError(
+                "CentralZonotopalAlgebra: unknown algorithm %s" % algorithm)
+        if workers is not None and workers > 1:
+            with worker_pool(self, workers) as pool:
+                return self._D_space_basis(checkpoint, workers, pool)
+        return self._D_space_basis(checkpoint)
+
+    def _D_space_basis_mod(self, p):
+        r"""
+        Return the D-space basis of the reduction of the matrix modulo the
+        prime ``p``, with polynomials given by dictionaries from exponent
+        tuples to integers, or ``None`` if ``p`` is a bad prime.
+
+        A prime is bad if the matrix cannot be reduced modulo ``p``, if the
+        matroid of the reduction differs from the matroid of the matrix, or if
+        the recursion breaks down modulo ``p``.
+        """
+        try:
+            X_p = self._input_matrix.change_ring(GF(p))
+            Z_p = CentralZonotopalAlgebra(
+                X_p, self.polynomial_ring().variable_names())
+            # the spaces modulo p are only needed for this computation
+            Z_p._use_disk_cache = False
+            if not Z_p._matroid().equals(self._matroid()):
+                return None
+            basis = Z_p._D_space_basis()
+        except (ArithmeticError, ValueError):
+            return None
+        return dict((B, dict((e, int(c)) for (e, c) in _exponent_items(d)))
+                    for (B, d) in basis.items())
+
+    def _D_space_basis_mod_chunk(self, primes):
+        return [self._D_space_basis_mod(p) for p in primes]
+
+    def _D_space_basis_modular(self, workers=None, max_rounds=8):
+        r"""
+        Return the central D-space basis over `\QQ`, computed by the D-space
+        recursion modulo primes below `2^{30}`, followed by Chinese
+        remaindering and rational reconstruction of the coefficients.
+
+        Primes are added in rounds of doubling size until the reconstructed
+        basis is dual to the P-space basis and annihilated by the J-ideal,
+        which characterizes the D-space basis.  An ``ArithmeticError`` is
+        raised if no basis is found after ``max_rounds`` rounds.
+
+        A prime can be bad without the recursion failing modulo it, for
+        instance if a derivative only vanishes modulo the prime and a
+        projection is skipped.  The primes are therefore grouped by the
+        ``residue_signature`` of their residue bases, and only the largest
+        group is reconstructed, so that a minority of bad primes does not
+        corrupt the reconstruction.
+        """
+        if self.base_field() != QQ:
+            raise ValueError("CentralZonotopalAlgebra: the modular algorithm "
+                             "requires a matrix over the rational field")
+        P = self.polynomial_ring()
+        # primes and residue bases, grouped by their signatures
+        groups = {}
+        p = 2**30
+        count = max(4, workers or 1)
+        tried = 0
+        for _ in range(max_rounds):
+            batch = []
+            for _ in range(count):
+                p = previous_prime(p)
+                batch.append(p)
+            tried += count
+            if workers is not None and workers > 1:
+                results = parallel_chunks(self, "_D_space_basis_mod_chunk",
+                                          batch, workers, chunk_size=1)
+            else:
+                results = self._D_space_basis_mod_chunk(batch)
+            for (q, basis) in zip(batch, results):
+                if basis is not None:
+                    primes, residues = groups.setdefault(
+                        residue_signature(basis), ([], []))
+                    primes.append(q)
+                    residues.append(basis)
+
+            if groups:
+                primes, residues = max(groups.values(),
+                                       key=lambda g: len(g[0]))
+                basis = reconstruct_basis(P, residues, primes)
+                if basis is not None and self._is_D_space_basis(basis):
+                    return basis
+            count *= 2
+        raise ArithmeticError(
+            "CentralZonotopalAlgebra: the modular algorithm found no D-space "
+            "basis with %s primes, of which %s were good"
+            % (tried, sum(len(g[0]) for g in groups.values())))
+
+    def _is_D_space_basis(self, basis):
+        r"""
+        Return whether ``basis`` is dual to the P-space basis and annihilated
+        by the J-ideal, which determines the D-space basis uniquely.
+        """
+        P_basis = self.P_space_basis()
+        if set(P_basis) != set(basis):
+            return False
+        keys = list(P_basis)
+        D_polys = [basis[k] for k in keys]
+        G = diff_bilinear_gram_matrix(self.polynomial_ring(),
+                                      [P_basis[k] for k in keys], D_polys)
+        if not G.is_one():
+            return False
+        return all(not d for j in self.J_ideal_gens()
+                   for d in poly_deriv_many(j, D_polys))
+
+    def _D_space_basis(self, checkpoint=None, workers=None, pool=None):
+        basis = {}
+        P = self.polynomial_ring()
+        M = self._ordered_matroid()
+        ord_groundset = M.groundset_order()
+        # handle ordering convention in OrderedMatroid class
+        ord_groundset.reverse()
 
         # For each independent set I, construct the D-space basis polynomial by
         # extending the basis polynomial associated with I - x where x is the
-        # maximal element of I
+        # maximal element of I.  The independent sets I0 which x extends are
+        # exactly those with x outside their closure, so they are indexed by
+        # x as soon as their closure is known.
+        extensions = dict((x, []) for x in ord_groundset)
+        closures = {}
+
+        def register(I, F, later):
+            closures[I] = F
+            for y in later:
+                if y not in F:
+                    extensions[y].append(I)
 
         # base case: empty set
-        basis[frozenset([])] = P.one()
+        basis[frozenset([])] = HomogeneousPolynomial(
+            P, 0, [P.base_ring().one()])
+        start = 0
+        checkpointer = None
+        if checkpoint is not None:
+            checkpointer = Checkpointer(checkpoint, self._fingerprint())
+            state = load_checkpoint(checkpoint, self._fingerprint(), P)
+            if state is not None:
+                start, basis = state
+                basis = dict((I, HomogeneousPolynomial.from_polynomial(P, p))
+                             for (I, p) in basis.items())
+        for I in basis:
+            register(I, M.closure(I), ord_groundset[start:])
 
-        # recursively construct for additional elements in ord_groundset
-        for x in ord_groundset:
-            basis_update = {}
-            for I0 in basis:
-                # TODO give a more efficient enumeration of ind. set extensions
+        # recursively construct for additional elements in ord_groundset; the
+        # extensions by x only depend on polynomials of sets avoiding x
+        for i in range(start, len(ord_groundset)):
+            x = ord_groundset[i]
+            later = ord_groundset[i + 1:]
+            tasks = []
+            for I0 in extensions.pop(x):
                 I = I0 | frozenset([x])
-                if not M.is_independent(I):
-                    continue
-
-                # identify starting D-space polynomial
-                d0 = basis[I0]
-
-                # identify flat for computation and J-generator for differentiation
-                F0 = M.closure(I0)
                 F = M.closure(I)
-                # note for comparisons that the reverse order is used for notation
-                cocirc = frozenset(
-                    filter(lambda c: gs_key(c) <= gs_key(x), F - F0)
-                )
-                J_gen = pure_tensor(P, X_cols, cocirc)
-
-                # compute orthogonal polynomial p_eta
-                orthog_vec = self._hyperplane_normal(F0, F)
-                p_eta = linear_form(P, orthog_vec)
-
-                # extend d0 by power of orthogonal vector
-                d = d0 * p_eta**(J_gen.degree() - 1)
-
-                # compute derivative of d1 by J_gen
-                d_deriv = poly_deriv(J_gen, d)
-
-                # only project if this derivative is nonzero
-                if d_deriv == P.zero():
-                    basis_update[I] = d
-                else:
-                    # construct polynomial vector space for projection
-                    dom_basis = dom_bases[F0]
-                    poly_indices = ext_ord.closed_interval(I0, dom_basis)
-                    poly_indices.remove(I0)
-                    polys = [p_eta**(d.degree() - basis[J].degree()) * basis[J]
-                             for J in poly_indices]
-                    poly_derivs = [poly_deriv(J_gen, p) for p in polys]
-                    P_mod = PolynomialFreeModule(P, basis=tuple(poly_derivs))
-
-                    # decompose d derivative in this polynomial vector space
-                    decomposition = P_mod(d_deriv).to_vector()
-                    d_proj = d
-                    for coeff, poly in zip(decomposition, polys):
-                        d_proj -= coeff * poly
-                    basis_update[I] = d_proj
-
-            # update basis with new polynomials including x
-            basis.update(basis_update)
+                register(I, F, later)
+                tasks.append((I0, x, closures[I0], F))
+
+            if pool is not None and len(tasks) > 1:
+                # ship each task with the polynomials it may project against
+                tasks = [(I0, x, F0, F,
+                          dict((J, basis[J]) for J in
+                               [I0] + self._D_space_interval(I0, F0)))
+                         for (I0, x, F0, F) in tasks]
+                polys = parallel_chunks(self, "_D_space_extension_chunk",
+                                        tasks, workers, pool=pool)
+            else:
+                polys = [self._D_space_extension(I0, x, F0, F, basis)
+                         for (I0, x, F0, F) in tasks]
+            for (task, d) in zip(tasks, polys):
+                basis[task[0] | frozenset([x])] = d
+            if checkpointer is not None:
+                checkpointer.save(i + 1, basis,
+                                  force=(i + 1 == len(ord_groundset)))
 
         # normalize polynomials against P-space
         D_basis = {}
         P_basis = self.P_space_basis()
         for B in M.bases():
-            coeff = diff_bilinear_form(P_basis[B], basis[B])
-            D_basis[B] = basis[B] / coeff
+            d = basis[B].to_polynomial()
+            coeff = diff_bilinear_form(P_basis[B], d)
+            D_basis[B] = d / coeff
 
         return D_basis
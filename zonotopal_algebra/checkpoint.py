@@ -0,0 +1,140 @@
+r"""
+On-disk checkpoints of partially computed polynomial bases.
+
+A checkpoint is a zlib-compressed pickle of a dictionary recording the format
+version, a fingerprint of the zonotopal algebra it belongs to, the number of
+completed steps and the polynomials computed so far.  Polynomials are stored
+as dictionaries from exponent tuples to coefficients, which do not depend on
+the polynomial ring objects of the session which wrote them.
+"""
+import os
+import pickle
+import tempfile
+import time
+import zlib
+
+from .poly_utils import _exponent_items
+
+CHECKPOINT_VERSION = 1
+
+# the minimal number of seconds between two checkpoints of a computation
+CHECKPOINT_INTERVAL = 60
+
+
+def save_checkpoint(path, fingerprint, completed, basis):
+    r"""
+    Write a checkpoint atomically to ``path``.
+
+    The data is written to a temporary file in the same directory, which then
+    replaces ``path``, so that an interrupted write leaves the previous
+    checkpoint intact.
+
+    INPUT:
+
+    - ``path`` -- a file name
+    - ``fingerprint`` -- a string identifying the computation
+    - ``completed`` -- the number of completed steps
+    - ``basis`` -- a dictionary from frozensets to polynomials
+    """
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "fingerprint": fingerprint,
+        "completed": completed,
+        "basis": [(tuple(I), dict(_exponent_items(p)))
+                  for (I, p) in basis.items()],
+    }
+    data = zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        f = os.fdopen(fd, "wb")
+    except BaseException:
+        os.close(fd)
+        os.unlink(tmp_path)
+        raise
+    try:
+        with f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class Checkpointer:
+    r"""
+    Class Checkpointer saves the state of a computation with
+    ``save_checkpoint``, at most once per ``interval`` seconds, since every
+    checkpoint rewrites all polynomials computed so far.
+
+    INPUT:
+
+    - ``path`` -- a file name
+    - ``fingerprint`` -- a string identifying the computation
+    - ``interval`` -- (default: ``CHECKPOINT_INTERVAL``) the minimal number
+      of seconds between two checkpoints
+
+    EXAMPLES:
+
+        sage: path = tmp_filename(ext=".ckpt")
+        sage: checkpointer = Checkpointer(path, "abc", interval=3600)
+        sage: checkpointer.save(1, {})
+        False
+        sage: checkpointer.save(2, {}, force=True)
+        True
+        sage: P.<x> = PolynomialRing(QQ)
+        sage: load_checkpoint(path, "abc", P)
+        (2, {})
+    """
+
+    def __init__(self, path, fingerprint, interval=CHECKPOINT_INTERVAL):
+        self._path = path
+        self._fingerprint = fingerprint
+        self._interval = interval
+        self._last_save = time.monotonic()
+
+    def save(self, completed, basis, force=False):
+        r"""
+        Save a checkpoint if ``force`` is ``True`` or if the last checkpoint
+        is at least ``interval`` seconds old, and return whether a checkpoint
+        was saved.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_save < self._interval:
+            return False
+        save_checkpoint(self._path, self._fingerprint, completed, basis)
+        self._last_save = time.monotonic()
+        return True
+
+
+def load_checkpoint(path, fingerprint, P):
+    r"""
+    Read a checkpoint written by ``save_checkpoint``.
+
+    INPUT:
+
+    - ``path`` -- a file name
+    - ``fingerprint`` -- the fingerprint the checkpoint must have been
+      written with
+    - ``P`` -- the polynomial ring of the stored polynomials
+
+    OUTPUT:
+
+    ``None`` if there is no file at ``path``, and otherwise a pair of the
+    number of completed steps and the dictionary of stored polynomials, in
+    the order in which they were saved.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        state = pickle.loads(zlib.decompress(f.read()))
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError("checkpoint %s has unsupported version %s"
+                         % (path, state.get("version")))
+    if state["fingerprint"] != fingerprint:
+        raise ValueError("checkpoint %s was written for a different "
+                         "computation" % path)
+    basis = dict((frozenset(I), P(p)) for (I, p) in state["basis"])
+    return (state["completed"], basis)
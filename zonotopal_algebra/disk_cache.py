@@ -0,0 +1,210 @@
+r"""
+Persistent on-disk cache of the ideals and spaces of zonotopal algebras.
+
+The cache is opt-in: after ``set_disk_cache(DiskCache(path))``, the methods
+decorated with ``disk_cached`` look up their results in a SQLite file under
+the fingerprint of the zonotopal algebra (its variant, base field, matrices
+and variable names) and the name of the method, so that results are shared
+between processes and sessions.  Entries are evicted in least recently used
+order once the stored data exceeds a size cap.
+"""
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from collections import namedtuple
+
+from sage.misc.decorators import sage_wraps
+
+from .poly_utils import _exponent_items
+
+DiskCacheInfo = namedtuple("DiskCacheInfo",
+                           ["hits", "misses", "entries", "size", "max_size"])
+
+# the cache consulted by the methods decorated with ``disk_cached``
+_disk_cache = None
+
+
+def set_disk_cache(cache):
+    r"""
+    Set the cache consulted by zonotopal algebras, and return the previous
+    one.
+
+    INPUT:
+
+    - ``cache`` -- a ``DiskCache``, or ``None`` to disable caching on disk
+    """
+    global _disk_cache
+    previous = _disk_cache
+    _disk_cache = cache
+    return previous
+
+
+def disk_cache():
+    r"""
+    Return the cache consulted by zonotopal algebras, or ``None``.
+    """
+    return _disk_cache
+
+
+class DiskCache:
+    r"""
+    Class DiskCache implements a persistent key-value store in a SQLite file,
+    with least recently used eviction beyond a size cap and counters of the
+    hits and misses of lookups through this object.
+
+    INPUT:
+
+    - ``path`` -- the file name of the SQLite database
+    - ``max_size`` -- (default: ``2^30``) the maximal total size in bytes of
+      the stored values
+
+    EXAMPLES:
+
+        sage: cache = DiskCache(tmp_filename(ext=".sqlite"), max_size=100)
+        sage: cache.set("a", [1, 2])
+        sage: cache.get("a")
+        (True, [1, 2])
+        sage: cache.get("b")
+        (False, None)
+        sage: cache.set("b", list(range(100)))
+        sage: cache.get("b")
+        (False, None)
+        sage: info = cache.cache_info()
+        sage: (info.hits, info.misses, info.entries, info.size > 0)
+        (1, 2, 1, True)
+    """
+
+    def __init__(self, path, max_size=2**30):
+        self._path = path
+        self._max_size = max_size
+        self._connection = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self):
+        # connections must not be shared with forked worker processes
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._path, timeout=60)
+            self._pid = os.getpid()
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+            self._connection.commit()
+        return self._connection
+
+    def get(self, key):
+        r"""
+        Return a pair ``(True, value)`` if a value is stored under ``key``,
+        and ``(False, None)`` otherwise.
+        """
+        db = self._db()
+        row = db.execute("SELECT value FROM entries WHERE key = ?",
+                         (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return (False, None)
+        db.execute("UPDATE entries SET accessed = ? WHERE key = ?",
+                   (time.time(), key))
+        db.commit()
+        self.hits += 1
+        return (True, pickle.loads(zlib.decompress(row[0])))
+
+    def set(self, key, value):
+        r"""
+        Store ``value`` under ``key``, and evict the least recently used
+        entries while the stored values exceed the size cap.  Values larger
+        than the size cap are not stored.
+        """
+        data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if len(data) > self._max_size:
+            return
+        db = self._db()
+        with db:
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                       (key, data, len(data), time.time()))
+            total = db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self._max_size:
+                rows = db.execute("SELECT key, size FROM entries "
+                                  "WHERE key != ? ORDER BY accessed",
+                                  (key,)).fetchall()
+                for (old_key, size) in rows:
+                    if total <= self._max_size:
+                        break
+                    db.execute("DELETE FROM entries WHERE key = ?",
+                               (old_key,))
+                    total -= size
+
+    def clear(self):
+        r"""
+        Remove all entries and reset the counters.
+        """
+        db = self._db()
+        with db:
+            db.execute("DELETE FROM entries")
+        self.hits = 0
+        self.misses = 0
+
+    def cache_info(self):
+        r"""
+        Return the hits and misses of this object, and the number and total
+        size of the stored entries.
+        """
+        entries, size = self._db().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return DiskCacheInfo(self.hits, self.misses, entries, size,
+                             self._max_size)
+
+
+def _encode(value):
+    r"""
+    Return a representation of a list of polynomials or a dictionary from
+    frozensets to polynomials by builtin types.
+    """
+    if isinstance(value, dict):
+        return ("dict", [(tuple(k), dict(_exponent_items(p)))
+                         for (k, p) in value.items()])
+    return ("list", [dict(_exponent_items(p)) for p in value])
+
+
+def _decode(data, P):
+    r"""
+    Return the value represented by ``_encode``, with polynomials in ``P``.
+    """
+    kind, items = data
+    if kind == "dict":
+        return dict((frozenset(k), P(p)) for (k, p) in items)
+    return [P(p) for p in items]
+
+
+def disk_cached(method):
+    r"""
+    Decorator for methods of zonotopal algebras returning lists of
+    polynomials or dictionaries from frozensets to polynomials, which looks
+    up and stores their results in the cache of ``set_disk_cache``, if any.
+
+    Zonotopal algebras with ``_use_disk_cache`` set to ``False``, such as
+    the reductions modulo primes of the modular algorithm, bypass the cache.
+    The arguments of the method are not part of the key, since they are
+    assumed to only select how the result is computed.  A result found in
+    the cache is returned without calling the method.
+    """
+    name = method.__name__
+
+    @sage_wraps(method)
+    def wrapper(self, *args, **kwds):
+        cache = _disk_cache
+        if cache is None or not self._use_disk_cache:
+            return method(self, *args, **kwds)
+        key = "%s:%s" % (self._fingerprint(), name)
+        found, data = cache.get(key)
+        if found:
+            return _decode(data, self.polynomial_ring())
+        value = method(self, *args, **kwds)
+        cache.set(key, _encode(value))
+        return value
+    return wrapper
@@ -2,9 +2,11 @@ from sage.matrix.constructor import Matrix
 from sage.misc.cachefunc import cached_method
 
 from .abstract_zonotopal_algebra import AbstractZonotopalAlgebra
+from .abstract_zonotopal_algebra import _ignore_workers
 from .central_zonotopal_algebra import CentralZonotopalAlgebra
-from .poly_utils import linear_form
-from .poly_utils import pure_tensor
+from .disk_cache import disk_cached
+from .parallel import parallel_chunks
+from .poly_utils import linear_form_power
 
 
 class ExternalZonotopalAlgebra(AbstractZonotopalAlgebra):
@@ -27,6 +29,11 @@ class ExternalZonotopalAlgebra(AbstractZonotopalAlgebra):
         return "External Zonotopal Algebra over " + str(self.base_field()) \
             + " with matrix\n" + str(self.matrix())
 
+    def _constructor_data(self):
+        cls, args, kwds = AbstractZonotopalAlgebra._constructor_data(self)
+        kwds["externalBasisMatrix"] = self._ext_basis_matrix
+        return (cls, args, kwds)
+
     def external_matrix(self):
         return self._ext_block_matrix
 
@@ -68,49 +75,139 @@ class ExternalZonotopalAlgebra(AbstractZonotopalAlgebra):
             yield self._external_basis(I)
 
     @cached_method
+    @disk_cached
     def I_ideal_gens(self):
         gens = []
         P = self.polynomial_ring()
         n = self._matroid().size()
-        for H in self._matroid().hyperplanes():
-            normal = self._hyperplane_normal(H)
-            gen = linear_form(P, normal)**(n - len(H) + 1)
+        for (H, normal) in self._hyperplane_normals():
+            gen = linear_form_power(P, normal, n - len(H) + 1)
             gens.append(gen)
         return gens
 
     @cached_method
-    def J_ideal_gens(self):
-        P = self.polynomial_ring()
+    def _external_basis_masks(self):
+        M = self._external_matroid()
+        return frozenset(M._mask(B) for B in self._external_bases())
+
+    def _generalized_cocircuits(self, candidates=None):
+        r"""
+        Iterate over the external generalized cocircuits, as subsets of the
+        groundset of the external matroid.
+
+        These are the external passive sets of the minimal non-external
+        independent sets of the external matroid in the antimatroid external
+        order.  They are enumerated lazily against a hashed index of the
+        external bases, without constructing the external order.
+
+        INPUT:
+
+        - ``candidates`` -- (default: ``None``) an iterable of pairs of
+          bitmasks of non-external independent sets of the external matroid
+          and their external passive sets, to which the enumeration is
+          restricted.  If ``None``, all non-external independent sets are
+          considered.
+        """
         M = self._external_matroid()
-        X_cols = self.external_matrix().columns()
-        # compute internal generalized cocircuits
-        L = M.external_order(variant="antimatroid")
-        non_external = set(L) - set(self._external_bases())
-        min_non_external = L.subposet(non_external).minimal_elements()
-        gen_cocircuits = [M.passive_elements(I) - I for I in min_non_external]
+        external = self._external_basis_masks()
+        if candidates is None:
+            candidates = M._external_order_complement(external)
+        for (I, ext_passive) in candidates:
+            if M._is_minimal_excluded(external, I, ext_passive):
+                yield M._unmask(ext_passive)
+
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def J_ideal_gens(self, workers=None):
+        r"""
+        Return the generators of the external J-ideal.
+
+        INPUT:
+
+        - ``workers`` -- (default: ``None``) if an integer greater than one,
+          the number of processes among which the candidate independent sets
+          of the external matroid are distributed
+
+        EXAMPLES:
+
+        The generators are the products of the linear forms of the external
+        passive sets of the minimal non-external independent sets of the
+        block matroid in its antimatroid external order::
+
+            sage: X = Matrix(QQ, [[1, 0], [1, 0], [0, 1], [1, 1], [1, 1]])
+            sage: Z = ExternalZonotopalAlgebra(X.transpose(), varNames="xy")
+            sage: M = Z._external_matroid()
+            sage: L = M.external_order(variant="antimatroid")
+            sage: non_external = set(L) - set(Z._external_bases())
+            sage: minimal = L.subposet(non_external).minimal_elements()
+            sage: products = Z._embedding_central_za._linear_form_products()
+            sage: gens = [products(M.passive_elements(I) - I)
+            ....:         for I in minimal]
+            sage: sorted(Z.J_ideal_gens()) == sorted(gens)
+            True
+        """
+        if workers is not None and workers > 1:
+            M = self._external_matroid()
+            external = self._external_basis_masks()
+            candidates = M._external_order_complement(external)
+            return parallel_chunks(self, "_J_ideal_gens_chunk", candidates,
+                                   workers)
+        return self._J_ideal_gens_chunk(None)
+
+    def _J_ideal_gens_chunk(self, candidates):
+        products = self._embedding_central_za._linear_form_products()
         # initialize generators
         gens = []
-        for c in gen_cocircuits:
-            gen = pure_tensor(P, X_cols, c)
+        for c in self._generalized_cocircuits(candidates):
+            gen = products(c)
             gens.append(gen)
         return gens
 
-    @cached_method
-    def P_space_basis(self):
-        basis = {}
-        P = self.polynomial_ring()
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def P_space_basis(self, workers=None):
+        r"""
+        Return the external P-space basis, indexed by the independent sets of
+        the matroid.
+
+        INPUT:
+
+        - ``workers`` -- (default: ``None``) if an integer greater than one,
+          the number of processes among which the independent sets are
+          distributed
+        """
         M = self._ordered_matroid()
-        X_cols = self.matrix().columns()
-        for I in M.independent_sets():
-            ext_passive = M.passive_elements(I) - I
-            elt = pure_tensor(P, X_cols, ext_passive)
-            basis[I] = elt
-        return basis
+        # both branches consume the same stream of activities, so that the
+        # keys of the basis are in the same order
+        ext_passives = ((I, passive - I)
+                        for (I, _, passive) in M.all_activities("independent"))
+        if workers is not None and workers > 1:
+            elts = parallel_chunks(self, "_P_space_basis_chunk",
+                                   ext_passives, workers)
+        else:
+            elts = self._P_space_basis_chunk(ext_passives)
+        return dict(elts)
 
-    @cached_method
-    def D_space_basis(self):
+    def _P_space_basis_chunk(self, ext_passives):
+        products = self._linear_form_products()
+        return [(I, products(ext_passive))
+                for (I, ext_passive) in ext_passives]
+
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def D_space_basis(self, workers=None, checkpoint=None,
+                      algorithm="recursive"):
+        r"""
+        Return the external D-space basis, indexed by the independent sets.
+
+        INPUT:
+
+        - ``workers``, ``checkpoint``, ``algorithm`` -- passed on to the
+          D-space basis of the embedding central zonotopal algebra
+        """
         M = self._matroid()
-        central_basis = self._embedding_central_za.D_space_basis()
+        central_basis = self._embedding_central_za.D_space_basis(
+            workers=workers, checkpoint=checkpoint, algorithm=algorithm)
         basis = {I: central_basis[self._external_basis(I)]
                  for I in M.independent_sets()}
         return basis
@@ -0,0 +1,286 @@
+r"""
+Dense coefficient arrays for homogeneous polynomials.
+
+A homogeneous polynomial of degree `d` in `n` variables is stored as the list
+of its coefficients at the monomials of degree `d`, in the order of
+``Monomials``, that is lexicographically decreasing in the exponents.  The
+index tables relating monomials of neighboring degrees are computed once per
+number of variables and degree, so that multiplication by linear forms and
+differentiation in the direction of a vector are single passes over the
+arrays.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _exponents(n, d):
+    r"""
+    Return the tuple of exponent tuples of the monomials of degree ``d`` in
+    ``n`` variables, lexicographically decreasing.
+    """
+    if n == 0:
+        return ((),) if d == 0 else ()
+    if n == 1:
+        return ((d,),)
+    return tuple((a,) + e for a in range(d, -1, -1)
+                 for e in _exponents(n - 1, d - a))
+
+
+@lru_cache(maxsize=None)
+def _index(n, d):
+    r"""
+    Return the dictionary from exponent tuples of degree ``d`` in ``n``
+    variables to their positions in ``_exponents(n, d)``.
+    """
+    return dict((e, i) for (i, e) in enumerate(_exponents(n, d)))
+
+
+def _unit(e, k, a):
+    return e[:k] + (e[k] + a,) + e[k + 1:]
+
+
+@lru_cache(maxsize=None)
+def _raise_table(n, d):
+    r"""
+    Return the table whose ``i``-th row lists, for each variable, the
+    position in degree ``d + 1`` of the ``i``-th monomial of degree ``d``
+    multiplied by the variable.
+    """
+    index = _index(n, d + 1)
+    return tuple(tuple(index[_unit(e, k, 1)] for k in range(n))
+                 for e in _exponents(n, d))
+
+
+@lru_cache(maxsize=None)
+def _lower_table(n, d):
+    r"""
+    Return the table whose ``i``-th row lists the triples ``(k, j, a)``
+    such that the derivative of the ``i``-th monomial of degree ``d`` by the
+    ``k``-th variable is ``a`` times the ``j``-th monomial of degree
+    ``d - 1``.
+    """
+    if d == 0:
+        return ((),)
+    index = _index(n, d - 1)
+    return tuple(tuple((k, index[_unit(e, k, -1)], a)
+                       for (k, a) in enumerate(e) if a)
+                 for e in _exponents(n, d))
+
+
+class HomogeneousPolynomial:
+    r"""
+    Class HomogeneousPolynomial stores a homogeneous polynomial of a
+    multivariate polynomial ring as a dense list of coefficients indexed by
+    the monomials of its degree.
+
+    INPUT:
+
+    - ``P`` -- a multivariate polynomial ring
+    - ``degree`` -- a nonnegative integer
+    - ``coeffs`` -- (default: ``None``) the list of coefficients at the
+      monomials of degree ``degree``, or ``None`` for the zero polynomial
+
+    EXAMPLES:
+
+        sage: P.<x, y> = PolynomialRing(QQ)
+        sage: h = HomogeneousPolynomial.from_polynomial(P, x*y)
+        sage: h.mul_linear_form([1, 2]).to_polynomial()
+        x^2*y + 2*x*y^2
+        sage: h.derivative([1, 1]).to_polynomial()
+        x + y
+        sage: (3 * h - h).to_polynomial()
+        2*x*y
+        sage: (-h * 2).to_polynomial()
+        -2*x*y
+    """
+    __slots__ = ("_ring", "_degree", "_coeffs")
+
+    def __init__(self, P, degree, coeffs=None):
+        self._ring = P
+        self._degree = degree
+        if coeffs is None:
+            zero = P.base_ring().zero()
+            coeffs = [zero] * len(_exponents(P.ngens(), degree))
+        self._coeffs = coeffs
+
+    @staticmethod
+    def from_polynomial(P, p, degree=None):
+        r"""
+        Return the dense representation of the homogeneous polynomial ``p``
+        of ``P``.
+
+        INPUT:
+
+        - ``P`` -- a multivariate polynomial ring
+        - ``p`` -- a homogeneous polynomial of ``P``
+        - ``degree`` -- (default: ``None``) the degree of ``p``.  It must be
+          given for a zero polynomial which is combined with polynomials of
+          positive degree, since the zero polynomial otherwise has degree 0.
+
+        EXAMPLES:
+
+            sage: P.<x, y> = PolynomialRing(QQ)
+            sage: h = HomogeneousPolynomial.from_polynomial(P, x*y)
+            sage: z = HomogeneousPolynomial.from_polynomial(P, 0, degree=2)
+            sage: (h - z).to_polynomial()
+            x*y
+            sage: HomogeneousPolynomial.from_polynomial(P, x, degree=2)
+            Traceback (most recent call last):
+            ...
+            ValueError: HomogeneousPolynomial: x is not of degree 2
+        """
+        p = P(p)
+        if not p:
+            return HomogeneousPolynomial(P, degree or 0)
+        if not p.is_homogeneous():
+            raise ValueError(
+                "HomogeneousPolynomial: %s is not homogeneous" % p)
+        if degree is not None and p.degree() != degree:
+            raise ValueError("HomogeneousPolynomial: %s is not of degree %s"
+                             % (p, degree))
+        h = HomogeneousPolynomial(P, p.degree())
+        index = _index(P.ngens(), h._degree)
+        for (e, c) in p.dict().items():
+            h._coeffs[index[tuple(e)]] = c
+        return h
+
+    def __reduce__(self):
+        return (HomogeneousPolynomial,
+                (self._ring, self._degree, self._coeffs))
+
+    def parent(self):
+        return self._ring
+
+    def degree(self):
+        return self._degree
+
+    def is_zero(self):
+        return not any(self._coeffs)
+
+    def __bool__(self):
+        return any(self._coeffs)
+
+    def dict(self):
+        r"""
+        Return the dictionary from exponent tuples to the nonzero
+        coefficients of this polynomial.
+        """
+        exponents = _exponents(self._ring.ngens(), self._degree)
+        return dict((exponents[i], c)
+                    for (i, c) in enumerate(self._coeffs) if c)
+
+    def to_polynomial(self):
+        r"""
+        Return this polynomial as an element of its polynomial ring.
+        """
+        return self._ring(self.dict())
+
+    def _check_degree(self, other):
+        if self._degree != other._degree:
+            raise ValueError("HomogeneousPolynomial: degrees %s and %s differ"
+                             % (self._degree, other._degree))
+
+    def __add__(self, other):
+        self._check_degree(other)
+        return HomogeneousPolynomial(
+            self._ring, self._degree,
+            [a + b for (a, b) in zip(self._coeffs, other._coeffs)])
+
+    def __sub__(self, other):
+        self._check_degree(other)
+        return HomogeneousPolynomial(
+            self._ring, self._degree,
+            [a - b for (a, b) in zip(self._coeffs, other._coeffs)])
+
+    def __neg__(self):
+        return HomogeneousPolynomial(self._ring, self._degree,
+                                     [-a for a in self._coeffs])
+
+    def __mul__(self, c):
+        return HomogeneousPolynomial(self._ring, self._degree,
+                                     [a * c for a in self._coeffs])
+
+    def __rmul__(self, c):
+        return HomogeneousPolynomial(self._ring, self._degree,
+                                     [c * a for a in self._coeffs])
+
+    def subtract_multiples(self, coeffs, polys):
+        r"""
+        Return this polynomial minus the linear combination of the
+        polynomials ``polys`` of the same degree with the coefficients
+        ``coeffs``.
+        """
+        result = list(self._coeffs)
+        for (c, h) in zip(coeffs, polys):
+            if not c:
+                continue
+            self._check_degree(h)
+            for (i, a) in enumerate(h._coeffs):
+                if a:
+                    result[i] -= c * a
+        return HomogeneousPolynomial(self._ring, self._degree, result)
+
+    def mul_linear_form(self, vec):
+        r"""
+        Return the product of this polynomial with the linear form with
+        coefficients ``vec``.
+        """
+        P = self._ring
+        n = P.ngens()
+        support = [(k, a) for (k, a) in enumerate(vec) if a]
+        result = HomogeneousPolynomial(P, self._degree + 1)
+        out = result._coeffs
+        table = _raise_table(n, self._degree)
+        for (i, c) in enumerate(self._coeffs):
+            if not c:
+                continue
+            row = table[i]
+            for (k, a) in support:
+                out[row[k]] += c * a
+        return result
+
+    def mul_linear_form_power(self, vec, k):
+        r"""
+        Return the product of this polynomial with the ``k``-th power of the
+        linear form with coefficients ``vec``.
+        """
+        h = self
+        for _ in range(k):
+            h = h.mul_linear_form(vec)
+        return h
+
+    def derivative(self, vec):
+        r"""
+        Return the derivative of this polynomial in the direction of the
+        vector ``vec``, that is, the result of applying the differential
+        operator of the linear form with coefficients ``vec``.
+        """
+        P = self._ring
+        if self._degree == 0:
+            return HomogeneousPolynomial(P, 0)
+        vec = list(vec)
+        result = HomogeneousPolynomial(P, self._degree - 1)
+        out = result._coeffs
+        table = _lower_table(P.ngens(), self._degree)
+        for (i, c) in enumerate(self._coeffs):
+            if not c:
+                continue
+            for (k, j, a) in table[i]:
+                v = vec[k]
+                if v:
+                    out[j] += c * a * v
+        return result
+
+    def derivative_product(self, vecs):
+        r"""
+        Return the result of applying the differential operator of the
+        product of the linear forms with coefficients ``vecs``, which is the
+        composition of the derivatives in the directions of the vectors.
+        """
+        h = self
+        for vec in vecs:
+            if not h:
+                return HomogeneousPolynomial(
+                    self._ring, max(self._degree - len(vecs), 0))
+            h = h.derivative(vec)
+        return h
@@ -1,8 +1,11 @@
 from sage.misc.cachefunc import cached_method
 
 from .abstract_zonotopal_algebra import AbstractZonotopalAlgebra
+from .abstract_zonotopal_algebra import _ignore_workers
 from .central_zonotopal_algebra import CentralZonotopalAlgebra
-from .poly_utils import linear_form
+from .disk_cache import disk_cached
+from .parallel import parallel_chunks
+from .poly_utils import linear_form_power
 from .poly_utils import pure_tensor
 
 
@@ -17,54 +20,120 @@ class InternalZonotopalAlgebra(AbstractZonotopalAlgebra):
                 + " with matrix\n"
                 + str(self.matrix()))
 
+    def _is_internal(self, B):
+        M = self._ordered_matroid()
+        int_active = M.coactive_elements(M.groundset() - B) & B
+        # no internally active elements
+        return len(int_active) == 0
+
     def _internal_bases(self):
         M = self._ordered_matroid()
-        G = M.groundset()
         for B in M.bases():
-            int_active = M.coactive_elements(G - B) & B
-            # no internally active elements
-            if len(int_active) == 0:
+            if self._is_internal(B):
                 yield B
 
     @cached_method
+    def _internal_basis_masks(self):
+        M = self._ordered_matroid()
+        return frozenset(M._mask(B) for B in self._internal_bases())
+
+    @cached_method
+    @disk_cached
     def I_ideal_gens(self):
         gens = []
         P = self.polynomial_ring()
         n = self._matroid().size()
-        for H in self._matroid().hyperplanes():
-            normal = self._hyperplane_normal(H)
-            gen = linear_form(P, normal)**(n - len(H) - 1)
+        for (H, normal) in self._hyperplane_normals():
+            gen = linear_form_power(P, normal, n - len(H) - 1)
             gens.append(gen)
         return gens
 
-    @cached_method
-    def J_ideal_gens(self):
-        P = self.polynomial_ring()
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def J_ideal_gens(self, workers=None):
+        r"""
+        Return the generators of the internal J-ideal.
+
+        INPUT:
+
+        - ``workers`` -- (default: ``None``) if an integer greater than one,
+          the number of processes among which the candidate independent sets
+          are distributed
+
+        EXAMPLES:
+
+        The generators are the products of the linear forms of the external
+        passive sets of the minimal non-internal independent sets in the
+        antimatroid external order::
+
+            sage: X = Matrix(QQ, [[1, 0], [1, 0], [0, 1], [1, 1], [1, 1]])
+            sage: Z = InternalZonotopalAlgebra(X.transpose(), varNames="xy")
+            sage: M = Z._ordered_matroid()
+            sage: L = M.external_order(variant="antimatroid")
+            sage: non_internal = set(L) - set(Z._internal_bases())
+            sage: minimal = L.subposet(non_internal).minimal_elements()
+            sage: products = Z._linear_form_products()
+            sage: gens = [products(M.passive_elements(I) - I)
+            ....:         for I in minimal]
+            sage: sorted(Z.J_ideal_gens()) == sorted(gens)
+            True
+        """
         M = self._ordered_matroid()
-        X_cols = self.matrix().columns()
-        # compute internal generalized cocircuits
-        L = M.external_order(variant="antimatroid")
-        non_internal = set(L) - set(self._internal_bases())
-        min_non_internal = L.subposet(non_internal).minimal_elements()
-        gen_cocircuits = [M.passive_elements(I) - I for I in min_non_internal]
+        # compute internal generalized cocircuits, which are the external
+        # passive sets of the minimal non-internal independent sets in the
+        # antimatroid external order
+        internal = self._internal_basis_masks()
+        candidates = M._external_order_complement(internal)
+        if workers is not None and workers > 1:
+            return parallel_chunks(self, "_J_ideal_gens_chunk", candidates,
+                                   workers)
+        return self._J_ideal_gens_chunk(candidates)
+
+    def _J_ideal_gens_chunk(self, candidates):
+        M = self._ordered_matroid()
+        products = self._linear_form_products()
+        internal = self._internal_basis_masks()
         # initialize generators
         gens = []
-        for c in gen_cocircuits:
-            gen = pure_tensor(P, X_cols, c)
-            gens.append(gen)
+        for (I, ext_passive) in candidates:
+            if M._is_minimal_excluded(internal, I, ext_passive):
+                c = M._unmask(ext_passive)
+                gen = products(c)
+                gens.append(gen)
         return gens
 
-    @cached_method
-    def P_space_basis(self):
-        basis = {}
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def P_space_basis(self, workers=None):
+        r"""
+        Return the internal P-space basis, indexed by the internal bases of
+        the matroid.
+
+        INPUT:
+
+        - ``workers`` -- (default: ``None``) if an integer greater than one,
+          the number of processes among which the bases are distributed
+        """
+        bases = self._ordered_matroid().bases()
+        if workers is not None and workers > 1:
+            elts = parallel_chunks(self, "_P_space_basis_chunk", bases,
+                                   workers)
+        else:
+            elts = self._P_space_basis_chunk(bases)
+        return dict(elts)
+
+    def _P_space_basis_chunk(self, bases):
         # for each element of internally passive bases, check if ext active set
         # in cocircuit is empty
         # if so, zero out b-component of largest elt in ext passive set
         P = self.polynomial_ring()
         M = self._ordered_matroid()
         X = self.matrix()
-        X_cols = self.matrix().columns()
-        for B in self._internal_bases():
+        products = self._linear_form_products()
+        elts = []
+        for B in bases:
+            if not self._is_internal(B):
+                continue
             ext_passive = M.passive_elements(B) - B
             projections = []
             for b in B:
@@ -89,12 +158,23 @@ class InternalZonotopalAlgebra(AbstractZonotopalAlgebra):
                 elt = pure_tensor(
                     P, X_projected.columns(), ext_passive)
             else:
-                elt = pure_tensor(P, X_cols, ext_passive)
-            basis[B] = elt
-        return basis
+                elt = products(ext_passive)
+            elts.append((B, elt))
+        return elts
 
-    @cached_method
-    def D_space_basis(self):
-        central_basis = self._central_za.D_space_basis()
+    @cached_method(key=_ignore_workers)
+    @disk_cached
+    def D_space_basis(self, workers=None, checkpoint=None,
+                      algorithm="recursive"):
+        r"""
+        Return the internal D-space basis, indexed by the internal bases.
+
+        INPUT:
+
+        - ``workers``, ``checkpoint``, ``algorithm`` -- passed on to the
+          D-space basis of the central zonotopal algebra
+        """
+        central_basis = self._central_za.D_space_basis(
+            workers=workers, checkpoint=checkpoint, algorithm=algorithm)
         basis = {B: central_basis[B] for B in self._internal_bases()}
         return basis
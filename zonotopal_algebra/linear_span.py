@@ -0,0 +1,145 @@
+r"""
+Incremental span computations for the flags of flats of an ordered matroid.
+
+Subsets of the groundset are represented as integer bitmasks, where bit ``i``
+corresponds to the ``i``-th groundset element in the order of the matroid.
+"""
+
+
+class IncrementalSpan:
+    r"""
+    Class IncrementalSpan maintains a running echelon form of a growing
+    collection of columns of a matrix, and with it the closure of these
+    columns in the corresponding linear matroid.
+
+    Every column not yet in the span is stored reduced against the chosen
+    columns, so adding a column costs a single elimination step per remaining
+    column, and membership in the span is a bit test.
+
+    INPUT:
+
+    - ``columns`` -- a list of vectors over a field, where the ``i``-th vector
+      represents the groundset element with bit ``i``
+
+    EXAMPLES:
+
+        sage: S = IncrementalSpan([vector(QQ, v) for v in
+        ....:                      [(1, 0), (0, 0), (1, 1), (2, 0), (0, 1)]])
+        sage: bin(S.span_mask())
+        '0b10'
+        sage: bin(S.add(3))
+        '0b1001'
+        sage: bin(S.add(0))
+        '0b0'
+        sage: bin(S.add(4))
+        '0b10100'
+        sage: S.rank()
+        2
+    """
+
+    def __init__(self, columns):
+        self._residuals = {}
+        self._span = 0
+        self._rank = 0
+        for (i, v) in enumerate(columns):
+            v = list(v)
+            if any(v):
+                self._residuals[i] = v
+            else:
+                # loops are spanned by the empty set
+                self._span |= 1 << i
+
+    def span_mask(self):
+        r"""
+        Return the bitmask of the closure of the columns added so far.
+        """
+        return self._span
+
+    def rank(self):
+        r"""
+        Return the rank of the columns added so far.
+        """
+        return self._rank
+
+    def copy(self):
+        r"""
+        Return a copy of this span which can be extended independently.
+        """
+        S = IncrementalSpan([])
+        # residual vectors are replaced rather than modified in ``add``, so
+        # they may be shared between copies
+        S._residuals = dict(self._residuals)
+        S._span = self._span
+        S._rank = self._rank
+        return S
+
+    def add(self, i):
+        r"""
+        Add the column with bit ``i`` to the span, and return the bitmask of
+        the elements which are newly spanned.  If the column is already in
+        the span, nothing changes and ``0`` is returned.
+        """
+        if self._span >> i & 1:
+            return 0
+        v = self._residuals.pop(i)
+        p = next(k for (k, a) in enumerate(v) if a)
+        vp = v[p]
+        new = 1 << i
+        residuals = self._residuals
+        for (j, w) in list(residuals.items()):
+            wp = w[p]
+            if not wp:
+                continue
+            c = wp / vp
+            w = [a - c * b for (a, b) in zip(w, v)]
+            if any(w):
+                residuals[j] = w
+            else:
+                del residuals[j]
+                new |= 1 << j
+        self._span |= new
+        self._rank += 1
+        return new
+
+
+class ClosureSpan:
+    r"""
+    Class ClosureSpan provides the interface of ``IncrementalSpan`` for an
+    arbitrary matroid, by recomputing the closure of the added elements from
+    a closure oracle after each addition.
+
+    INPUT:
+
+    - ``closure`` -- a function taking the bitmask of a subset of the
+      groundset to the bitmask of its closure
+    """
+
+    def __init__(self, closure):
+        self._closure = closure
+        self._elements = 0
+        self._span = closure(0)
+        self._rank = 0
+
+    def span_mask(self):
+        return self._span
+
+    def rank(self):
+        return self._rank
+
+    def copy(self):
+        S = ClosureSpan.__new__(ClosureSpan)
+        S._closure = self._closure
+        S._elements = self._elements
+        S._span = self._span
+        S._rank = self._rank
+        return S
+
+    def add(self, i):
+        if self._span >> i & 1:
+            return 0
+        self._elements |= 1 << i
+        F = self._closure(self._elements)
+        new = F & ~self._span
+        self._span = F
+        self._rank += 1
+        return new
@@ -0,0 +1,97 @@
+r"""
+Chinese remaindering and rational reconstruction of polynomial bases computed
+modulo several primes.
+
+A basis modulo a prime is given as a dictionary from keys to polynomials, and
+each polynomial as a dictionary from exponent tuples to integer residues.
+"""
+from sage.arith.misc import inverse_mod
+from sage.arith.misc import rational_reconstruction
+from sage.misc.misc_c import prod
+from sage.rings.integer_ring import ZZ
+
+
+def crt_idempotents(moduli):
+    r"""
+    Return the product `m` of the pairwise coprime ``moduli`` and the list of
+    integers `e_i` with `e_i \equiv 1` modulo the `i`-th modulus and
+    `e_i \equiv 0` modulo the others, so that `\sum_i r_i e_i` reduces modulo
+    `m` to the solution of the congruences `x \equiv r_i`.
+
+    EXAMPLES:
+
+        sage: m, es = crt_idempotents([3, 5])
+        sage: m, [e % 3 for e in es], [e % 5 for e in es]
+        (15, [1, 0], [0, 1])
+    """
+    m = prod(ZZ(q) for q in moduli)
+    idempotents = []
+    for q in moduli:
+        cofactor = m // q
+        idempotents.append(cofactor * inverse_mod(cofactor % q, q))
+    return (m, idempotents)
+
+
+def residue_signature(basis):
+    r"""
+    Return the shape of a basis modulo a prime: its keys, and for each key
+    the exponent tuples at which the polynomial has a nonzero residue.
+
+    The residue bases of good primes all share the signature of the basis
+    over `\QQ`, so primes whose residue bases have a different signature
+    can be discarded before reconstruction.
+
+    EXAMPLES:
+
+        sage: residue_signature({frozenset([0, 2]): {(1, 0): 3, (0, 1): 1}})
+        (((0, 2), ((0, 1), (1, 0))),)
+    """
+    return tuple(sorted((tuple(sorted(key)),
+                         tuple(sorted(e for (e, c) in poly.items() if c)))
+                        for (key, poly) in basis.items()))
+
+
+def reconstruct_basis(P, residues, moduli):
+    r"""
+    Return the basis over `\QQ` whose coefficients are congruent to the given
+    residues modulo each of the moduli.
+
+    INPUT:
+
+    - ``P`` -- a polynomial ring over `\QQ`
+    - ``residues`` -- a list of bases modulo each modulus, with the same keys
+    - ``moduli`` -- a list of pairwise coprime integers
+
+    OUTPUT:
+
+    A dictionary from the keys of the bases to polynomials in ``P``, or
+    ``None`` if some coefficient has no rational reconstruction modulo the
+    product of the moduli.
+
+    EXAMPLES:
+
+        sage: P.<x, y> = PolynomialRing(QQ)
+        sage: residues = [{0: {(1, 0): 3, (0, 1): 1}},
+        ....:             {0: {(1, 0): 4, (0, 1): 1}}]
+        sage: reconstruct_basis(P, residues, [5, 7])
+        {0: 1/2*x + y}
+    """
+    m, idempotents = crt_idempotents(moduli)
+    basis = {}
+    for key in residues[0]:
+        polys = [r[key] for r in residues]
+        exponents = set()
+        for p in polys:
+            exponents.update(p)
+        coeffs = {}
+        for e in exponents:
+            a = sum(p.get(e, 0) * idem
+                    for (p, idem) in zip(polys, idempotents)) % m
+            if not a:
+                continue
+            try:
+                coeffs[e] = rational_reconstruction(a, m)
+            except (ArithmeticError, ValueError):
+                return None
+        basis[key] = P(coeffs)
+    return basis
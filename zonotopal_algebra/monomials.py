@@ -1,6 +1,9 @@
+from math import comb
+
 from sage.categories.enumerated_sets import EnumeratedSets
-from sage.combinat.integer_lists.invlex import IntegerListsLex
 from sage.functions.other import binomial
+from sage.rings.polynomial.multi_polynomial_ring_base import \
+    MPolynomialRing_base
 from sage.rings.polynomial.polydict import ETuple
 from sage.rings.infinity import Infinity
 from sage.rings.integer_ring import ZZ
@@ -10,6 +13,19 @@ from sage.structure.parent import Set_generic
 from sage.structure.unique_representation import UniqueRepresentation
 
 
+def _lex_exponents(n, d):
+    r"""
+    Iterate over the exponent tuples of length ``n`` and sum ``d`` in
+    lexicographically decreasing order.
+    """
+    if n == 1:
+        yield (d,)
+        return
+    for a in range(d, -1, -1):
+        for e in _lex_exponents(n - 1, d - a):
+            yield (a,) + e
+
+
 class Monomials(Set_generic, UniqueRepresentation):
     r"""
     Set representing a collection of monomials coming from a polynomail ring.
@@ -94,36 +110,127 @@ class Monomials(Set_generic, UniqueRepresentation):
                 and deg >= self._min_deg
                 and deg <= self._max_deg)
 
-    def _lex_iterator(self, d):
-        length = self._poly_ring.ngens()
-        return IntegerListsLex(n=d, length=length, element_constructor=list)
+    def exponents(self):
+        r"""
+        Iterate over the exponent tuples of the monomials, in the order in
+        which the monomials are iterated.
+
+        EXAMPLES:
 
-    def __iter__(self):
+            sage: P.<x, y> = PolynomialRing(QQ)
+            sage: list(Monomials(P, (1, 2)).exponents())
+            [(1, 0), (0, 1), (2, 0), (1, 1), (0, 2)]
+        """
+        n = self._poly_ring.ngens()
         deg = self._min_deg
         # iterate through individual degrees, small to large
         while deg <= self._max_deg:
-            it = iter(self._lex_iterator(deg))
-            try:
-                while True:
-                    yield self._monomial_from_degrees(it.next())
-            except GeneratorExit as e:
-                raise e
-            # handle termination of intermediate inverse lex iterators
-            except StopIteration:
-                pass
+            for e in _lex_exponents(n, deg):
+                yield e
             deg += 1
 
+    def __iter__(self):
+        for e in self.exponents():
+            yield self._monomial_from_degrees(e)
+
     def an_element(self):
-        it = iter(self)
-        return it.next()
+        return next(iter(self))
 
     def _monomial_from_degrees(self, v):
-        P = self._poly_ring
-        gens = P.gens()
-        p = P.one()
-        for i, t in enumerate(v):
-            p *= gens[i]**t
-        return p
+        return self._poly_ring.monomial(*v)
+
+    def _exponent_tuple(self, elt):
+        r"""
+        Return the exponent tuple of a monomial, given either as an element
+        of the polynomial ring or by its exponents.
+        """
+        if isinstance(elt, (tuple, list, ETuple)):
+            return tuple(elt)
+        p = self._poly_ring(elt)
+        if not isinstance(self._poly_ring, MPolynomialRing_base):
+            return (p.degree(),)
+        return tuple(p.degrees())
+
+    def rank(self, exponents):
+        r"""
+        Return the position of a monomial in the iteration order of this set.
+
+        The monomials of lower degree are counted by a binomial coefficient,
+        and the position within a degree by the combinatorial number system,
+        with one binomial coefficient per variable.
+
+        INPUT:
+
+        - ``exponents`` -- a monomial, or its tuple of exponents
+
+        EXAMPLES:
+
+            sage: P.<x, y, z> = PolynomialRing(QQ)
+            sage: monoms = Monomials(P, (1, 3))
+            sage: monoms.rank(y*z)
+            7
+            sage: monoms.rank((0, 1, 1))
+            7
+            sage: all(monoms.rank(m) == i for (i, m) in enumerate(monoms))
+            True
+        """
+        e = self._exponent_tuple(exponents)
+        n = self._poly_ring.ngens()
+        d = sum(e)
+        if (len(e) != n or min(e) < 0
+                or d < self._min_deg or d > self._max_deg):
+            raise ValueError("Value %s is not a monomial%s"
+                             % (exponents, self._deg_string()))
+        # monomials of degree at least min_deg and less than d
+        r = comb(n + d - 1, n) - comb(n + self._min_deg - 1, n)
+        # monomials of degree d which are lexicographically larger
+        remaining = d
+        for i in range(n - 1):
+            r += comb(remaining - e[i] + n - i - 2, n - i - 1)
+            remaining -= e[i]
+        return r
+
+    def unrank(self, i):
+        r"""
+        Return the monomial at position ``i`` in the iteration order of this
+        set, inverting ``rank``.
+
+        EXAMPLES:
+
+            sage: P.<x, y, z> = PolynomialRing(QQ)
+            sage: monoms = Monomials(P, (1, 3))
+            sage: monoms.unrank(7)
+            y*z
+            sage: [monoms.unrank(i) for i in range(4)]
+            [x, y, z, x^2]
+        """
+        return self._monomial_from_degrees(self._unrank_exponents(i))
+
+    def _unrank_exponents(self, i):
+        n = self._poly_ring.ngens()
+        if i < 0 or i >= self.cardinality():
+            raise IndexError("index %s out of range for %s" % (i, self))
+        below = comb(n + self._min_deg - 1, n)
+        # find the degree, from the number of monomials up to each degree
+        d = self._min_deg
+        while comb(n + d, n) - below <= i:
+            d += 1
+        j = i - (comb(n + d - 1, n) - below)
+        # choose exponents from the left, skipping the blocks of monomials
+        # with larger exponents
+        e = []
+        remaining = d
+        for k in range(n - 1):
+            a = remaining
+            block = comb(n - k - 2, n - k - 2)
+            while j >= block:
+                j -= block
+                a -= 1
+                block = comb(remaining - a + n - k - 2, n - k - 2)
+            e.append(a)
+            remaining -= a
+        e.append(remaining)
+        return tuple(e)
 
     # TODO potentially implement a next(self, elt) method to compute more
     # efficiently than the default EnumeratedSets implementation
@@ -152,5 +259,7 @@ class Monomials(Set_generic, UniqueRepresentation):
         if isinstance(index, tuple) or isinstance(index, ETuple):
             mon = self._monomial_from_degrees(index)
             return self._element_constructor_(mon)
+        elif index in ZZ:
+            return self.unrank(index)
         else:
             return Parent.__getitem__(self, index)
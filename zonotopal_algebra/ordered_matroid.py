@@ -1,9 +1,41 @@
 from sage.matroids.matroid import Matroid
+from sage.matroids.linear_matroid import LinearMatroid
 from sage.combinat.posets.lattices import LatticePoset
 from sage.combinat.posets.posets import Poset
-from sage.combinat.subset import Subsets
+from sage.graphs.digraph import DiGraph
+from sage.misc.cachefunc import cached_method
 from warnings import warn
 
+from .linear_span import ClosureSpan
+from .linear_span import IncrementalSpan
+
+
+def _bits(m):
+    r"""
+    Iterate over the positions of the set bits of ``m``, smallest first.
+    """
+    while m:
+        low = m & -m
+        yield low.bit_length() - 1
+        m ^= low
+
+
+def _bits_reversed(m):
+    r"""
+    Iterate over the positions of the set bits of ``m``, largest first.
+    """
+    while m:
+        i = m.bit_length() - 1
+        yield i
+        m ^= 1 << i
+
+
+def _low_bit(m):
+    r"""
+    Return the position of the smallest set bit of the nonzero integer ``m``.
+    """
+    return (m & -m).bit_length() - 1
+
 
 class OrderedMatroid(Matroid):
     r"""
@@ -28,15 +60,21 @@ class OrderedMatroid(Matroid):
         else:
             gs = sorted(gs, **kwargs)
 
+        # position of each element in the order, which is also its bit in the
+        # integer bitmask representation of subsets of the groundset
+        gs_index = {x: i for (i, x) in enumerate(gs)}
+
         def gs_key(x):
-            return gs.index(x)
+            return gs_index[x]
 
         def gs_cmp(x, y):
-            return gs.index(x) - gs.index(y)
+            return gs_index[x] - gs_index[y]
 
-        self._gs = gs          # groundset in sorted order
-        self._gs_key = gs_key  # groundset key function from this ordered list
-        self._gs_cmp = gs_cmp  # groundset cmp function from this ordered list
+        self._gs = gs                       # groundset in sorted order
+        self._gs_index = gs_index           # groundset element bit positions
+        self._gs_key = gs_key               # groundset key function
+        self._gs_cmp = gs_cmp               # groundset cmp function
+        self._gs_mask = (1 << len(gs)) - 1  # bitmask of the full groundset
 
     def groundset_order(self):
         return list(self._gs)
@@ -44,6 +82,78 @@ class OrderedMatroid(Matroid):
     def _sorted(self, S, **kwargs):
         return sorted(S, key=self._gs_key, **kwargs)
 
+    def _mask(self, X):
+        r"""
+        Return the integer bitmask of a subset ``X`` of the groundset, in
+        which bit ``i`` is set exactly when ``self._gs[i]`` lies in ``X``.
+        """
+        gs_index = self._gs_index
+        m = 0
+        for x in X:
+            m |= 1 << gs_index[x]
+        return m
+
+    def _unmask(self, m):
+        r"""
+        Return the subset of the groundset represented by the bitmask ``m``.
+        """
+        gs = self._gs
+        return frozenset(gs[i] for i in _bits(m))
+
+    @cached_method
+    def _loops_mask(self):
+        return self._mask(self._ground_matroid.loops())
+
+    @cached_method
+    def _coloops_mask(self):
+        return self._mask(self._ground_matroid.coloops())
+
+    def _closure_mask(self, m):
+        cl = self._ground_matroid.closure(self._unmask(m))
+        return self._mask(cl)
+
+    def _coclosure_mask(self, m):
+        cl = self._ground_matroid.coclosure(self._unmask(m))
+        return self._mask(cl)
+
+    @cached_method
+    def _representation_columns(self, dual=False):
+        r"""
+        Return the columns of a representation of the matroid, or of its dual
+        if ``dual`` is ``True``, in the order of the groundset, or ``None`` if
+        the underlying matroid is not a linear matroid.
+        """
+        M = self._ground_matroid
+        if dual:
+            M = M.dual()
+        if not isinstance(M, LinearMatroid):
+            return None
+        A = M.representation(order=self._gs)
+        return [list(c) for c in A.columns()]
+
+    def _span_engine(self):
+        r"""
+        Return a new span engine for computing closures of a growing
+        independent set, as in ``linear_span.IncrementalSpan``.
+
+        For linear matroids the engine keeps a running echelon form of the
+        chosen columns, and otherwise it falls back on matroid closures.
+        """
+        cols = self._representation_columns()
+        if cols is None:
+            return ClosureSpan(self._closure_mask)
+        return IncrementalSpan(cols)
+
+    def _cospan_engine(self):
+        r"""
+        Return a new span engine for computing coclosures of a growing
+        coindependent set.
+        """
+        cols = self._representation_columns(dual=True)
+        if cols is None:
+            return ClosureSpan(self._coclosure_mask)
+        return IncrementalSpan(cols)
+
     def __getattr__(self, item):
         return getattr(self._ground_matroid, item)  # redirection
 
@@ -65,7 +175,7 @@ class OrderedMatroid(Matroid):
         return self._ground_matroid
 
     def _circuit_root(self, C):
-        return min(C, key=self._gs_key)
+        return self._gs[_low_bit(self._mask(C))]
 
     def circuit_root(self, C):
         if self._ground_matroid.is_circuit(C):
@@ -74,7 +184,7 @@ class OrderedMatroid(Matroid):
             raise ValueError(str(C) + " is not a circuit")
 
     def _cocircuit_root(self, D):
-        return min(D, key=self._gs_key)
+        return self._gs[_low_bit(self._mask(D))]
 
     def cocircuit_root(self, D):
         if self._ground_matroid.is_cocircuit(D):
@@ -105,16 +215,18 @@ class OrderedMatroid(Matroid):
             sage: sorted( OM._dominant_basis(['b', 'd', 'e']) )
             ['b', 'd', 'e']
         """
-        X_sorted = self._sorted(X, reverse=True)
-
-        I = set()  # independent set
-        cl_I = self._ground_matroid.closure(I)
-        for x in X_sorted:
-            if x not in cl_I:
-                I.add(x)
-                cl_I = self._ground_matroid.closure(I)
+        return self._unmask(self._dominant_basis_mask(self._mask(X)))
 
-        return frozenset(I)
+    def _dominant_basis_mask(self, X):
+        r"""
+        Bitmask version of ``self._dominant_basis``.
+        """
+        I = 0  # independent set
+        span = self._span_engine()
+        for i in _bits_reversed(X):
+            if span.add(i):
+                I |= 1 << i
+        return I
 
     def _dominant_cobasis(self, X):
         """
@@ -139,16 +251,18 @@ class OrderedMatroid(Matroid):
             sage: sorted( OM._dominant_cobasis(['b', 'd', 'e']) )
             ['b', 'd', 'e']
         """
-        X_sorted = self._sorted(X, reverse=True)
+        return self._unmask(self._dominant_cobasis_mask(self._mask(X)))
 
-        cI = set()  # coindependent set
-        cl_cI = self._ground_matroid.coclosure(cI)
-        for x in X_sorted:
-            if x not in cl_cI:
-                cI.add(x)
-                cl_cI = self._ground_matroid.coclosure(cI)
-
-        return frozenset(cI)
+    def _dominant_cobasis_mask(self, X):
+        r"""
+        Bitmask version of ``self._dominant_cobasis``.
+        """
+        cI = 0  # coindependent set
+        cospan = self._cospan_engine()
+        for i in _bits_reversed(X):
+            if cospan.add(i):
+                cI |= 1 << i
+        return cI
 
     def _indep_activity(self, I):
         """
@@ -183,46 +297,41 @@ class OrderedMatroid(Matroid):
             sage: sorted( OM._indep_activity(['d', 'e', 'f', 'h']) )
             ['a', 'b', 'c']
         """
+        return self._unmask(self._indep_activity_mask(self._mask(I)))
 
+    def _indep_activity_mask(self, I):
+        r"""
+        Bitmask version of ``self._indep_activity``.
+        """
         # output active set
-        active = self._ground_matroid.loops()
-
-        # independent set ordered from largest to smallest
-        indep_elts = sorted(I, key=self._gs_key, reverse=True)
+        active = self._loops_mask()
 
-        prev_F = frozenset()
-        for (i, x) in enumerate(indep_elts):
-            # flat F spanned by elements x and larger
-            F = self._ground_matroid.closure(indep_elts[:i + 1])
-            # restrict to elements which are newly spanned, not in prev_F
-            newly_spanned = sorted(F - prev_F, key=self._gs_key)
-            # elements smaller than x in this flag component are active wrt I
-            new_active = newly_spanned[:newly_spanned.index(x)]
-            active |= frozenset(new_active)
-            # record most recent flat F for next flag computation
-            prev_F = F
+        # the flag of flats is built from the largest element to the smallest,
+        # extending the span of the elements x and larger one step at a time
+        span = self._span_engine()
+        for x in _bits_reversed(I):
+            newly_spanned = span.add(x)
+            # elements newly spanned which are smaller than x are active
+            active |= newly_spanned & ((1 << x) - 1)
 
-        return frozenset(active)
+        return active
 
     def _coindep_coactivity(self, cI):
+        return self._unmask(self._coindep_coactivity_mask(self._mask(cI)))
+
+    def _coindep_coactivity_mask(self, cI):
         # output coactive set
-        coactive = self._ground_matroid.coloops()
-
-        # independent set ordered from largest to smallest
-        coindep_elts = sorted(cI, key=self._gs_key, reverse=True)
-        prev_cF = frozenset()
-        for (i, x) in enumerate(coindep_elts):
-            # coflat cF spanned by elements x and larger
-            cF = self._ground_matroid.coclosure(coindep_elts[:i + 1])
-            # restrict to elements which are newly spanned, not in prev_cF
-            newly_spanned = sorted(cF - prev_cF, key=self._gs_key)
-            # elements smaller than x in flag component are coactive wrt cI
-            new_coactive = newly_spanned[:newly_spanned.index(x)]
-            coactive |= frozenset(new_coactive)
-            # record most recent flat F for next flag computation
-            prev_cF = cF
-
-        return frozenset(coactive)
+        coactive = self._coloops_mask()
+
+        # the coflag of coflats is built from the largest element to the
+        # smallest, extending the cospan one step at a time
+        cospan = self._cospan_engine()
+        for x in _bits_reversed(cI):
+            newly_cospanned = cospan.add(x)
+            # elements newly cospanned which are smaller than x are coactive
+            coactive |= newly_cospanned & ((1 << x) - 1)
+
+        return coactive
 
     def active_elements(self, X):
         """
@@ -255,18 +364,127 @@ class OrderedMatroid(Matroid):
             sage: sorted( OM.active_elements([0, 1, 2, 3]) )
             [0, 2]
         """
-        B = self._dominant_basis(X)
-        return self._indep_activity(B)
+        return self._unmask(self._active_mask(self._mask(X)))
+
+    def _active_mask(self, X):
+        return self._indep_activity_mask(self._dominant_basis_mask(X))
+
+    def _coactive_mask(self, X):
+        return self._coindep_coactivity_mask(self._dominant_cobasis_mask(X))
+
+    def _passive_mask(self, X):
+        return self._gs_mask & ~self._active_mask(X)
+
+    def _copassive_mask(self, X):
+        return self._gs_mask & ~self._coactive_mask(X)
 
     def coactive_elements(self, X):
-        cB = self._dominant_cobasis(X)
-        return self._coindep_coactivity(cB)
+        return self._unmask(self._coactive_mask(self._mask(X)))
 
     def passive_elements(self, X):
-        return frozenset(self._gs) - self.active_elements(X)
+        return self._unmask(self._passive_mask(self._mask(X)))
 
     def copassive_elements(self, X):
-        return frozenset(self._gs) - self.coactive_elements(X)
+        return self._unmask(self._copassive_mask(self._mask(X)))
+
+    def _activity_masks(self, kind="independent"):
+        r"""
+        Iterate over pairs ``(I, A)`` of bitmasks of independent sets ``I``
+        and their active sets ``A``.
+
+        The independent sets are enumerated as the nodes of a trie of their
+        elements sorted from largest to smallest, so that each independent
+        set extends the flag of flats of its parent in the trie by a single
+        flat.  If ``kind`` is ``bases``, only the bases are produced, and
+        branches of the trie which cannot be completed to a basis are pruned.
+        """
+        if kind == "independent":
+            bases_only = False
+        elif kind == "bases":
+            bases_only = True
+        else:
+            raise ValueError("OrderedMatroid: invalid kind specified for "
+                             "activities")
+
+        r = self._ground_matroid.rank()
+        n = len(self._gs)
+
+        # prefix_rank[y] is the rank of the elements smaller than y, which
+        # bounds the size of an extension by elements smaller than y
+        prefix_rank = [0] * (n + 1)
+        span = self._span_engine()
+        for y in range(n):
+            span.add(y)
+            prefix_rank[y + 1] = span.rank()
+
+        # nodes of the trie: an independent set, the span engine of its flag,
+        # its active set, and the bound below which its extensions lie
+        stack = [(0, self._span_engine(), self._loops_mask(), n)]
+        while stack:
+            I, span, active, bound = stack.pop()
+            size = span.rank()
+            if size == r:
+                yield (I, active)
+                continue
+            if not bases_only:
+                yield (I, active)
+            F = span.span_mask()
+            for y in range(bound):
+                if F >> y & 1:
+                    continue
+                if bases_only and size + 1 + prefix_rank[y] < r:
+                    continue
+                child_span = span.copy()
+                newly_spanned = child_span.add(y)
+                # elements newly spanned which are smaller than y are active
+                child_active = active | (newly_spanned & ((1 << y) - 1))
+                stack.append((I | 1 << y, child_span, child_active, y))
+
+    def all_activities(self, kind="independent"):
+        r"""
+        Iterate over all independent sets or bases together with their active
+        and passive elements.
+
+        The flag of flats of an independent set only depends on its elements
+        in decreasing order, so independent sets sharing their largest
+        elements share the beginning of their flags.  The independent sets
+        are traversed as a trie in which every flat of every flag is computed
+        exactly once, which is considerably faster than calling
+        ``self.passive_elements`` on each independent set separately.
+
+        INPUT:
+
+        - ``kind`` -- (default: ``independent``) a string, either
+          ``independent`` or ``bases``, describing whether all independent
+          sets or only the bases of the matroid are considered.
+
+        OUTPUT:
+
+        An iterator over triples ``(I, active, passive)`` of ``frozenset``
+        objects, where ``I`` is an independent set and ``active`` and
+        ``passive`` are as given by ``self.active_elements(I)`` and
+        ``self.passive_elements(I)``.
+
+        EXAMPLES::
+
+            sage: X = Matrix(QQ, [[1, 0], [0, 1], [1, 1], [1, 1]]).transpose()
+            sage: M = Matroid(matrix=X)
+            sage: OM = OrderedMatroid(M)
+            sage: acts = sorted((sorted(B), sorted(A), sorted(P))
+            ....:               for (B, A, P) in OM.all_activities("bases"))
+            sage: for act in acts: print(act)
+            ([0, 1], [], [0, 1, 2, 3])
+            ([0, 2], [], [0, 1, 2, 3])
+            ([0, 3], [2], [0, 1, 3])
+            ([1, 2], [0], [1, 2, 3])
+            ([1, 3], [0, 2], [1, 3])
+            sage: len(list(OM.all_activities()))
+            10
+        """
+        for (I, active) in self._activity_masks(kind):
+            passive = self._gs_mask & ~active
+            yield (self._unmask(I), self._unmask(active),
+                   self._unmask(passive))
 
     def dual(self):
         """
@@ -346,91 +564,298 @@ class OrderedMatroid(Matroid):
             sage: ext_order.rank()
             8
         """
-        M = self._ground_matroid
         E = self.groundset()
+        ext_passives, H = self._external_order_hasse_diagram()
 
-        if variant == 'convex geometry':
-            def passives_cmp(S, T):
-                return S.issuperset(T)
-        elif variant == 'antimatroid':
-            def passives_cmp(S, T):
-                return S.issubset(T)
-        else:
+        # both orientations are served from the same cached Hasse diagram
+        if variant == 'antimatroid':
+            H = H.reverse()
+        elif variant != 'convex geometry':
             raise ValueError("OrderedMatroid: invalid variant "
                              "specified for external order")
 
-        if representation == 'independent':
-            def poset_object_gen(I, ext_passives):
-                return I
-        elif representation == 'passive':
-            def poset_object_gen(I, ext_passives):
-                return ext_passives
+        if representation == 'passive':
+            H = H.relabel(ext_passives, inplace=False)
         elif representation == 'convex':
-            def poset_object_gen(I, ext_passives):
-                return E - ext_passives
-        else:
+            convex = {I: E - ext_passives[I] for I in ext_passives}
+            H = H.relabel(convex, inplace=False)
+        elif representation != 'independent':
             raise ValueError("OrderedMatroid: invalid representation "
                              "specified for external order")
 
-        data = {}
-        for I in M.independent_sets():
-            ext_passives = self.passive_elements(I) - I
-            obj = poset_object_gen(I, ext_passives)
-            data[obj] = ext_passives
-
         if string_labels:
             def label(obj):
                 return self._set_to_str(obj)
-            labels = {obj: label(obj) for obj in data}
+            labels = {obj: label(obj) for obj in H.vertex_iterator()}
         else:
             labels = None
 
-        def poset_cmp(x, y):
-            px = data[x]
-            py = data[y]
-            return passives_cmp(px, py)
-
-        P = Poset(data=(data.keys(), poset_cmp), element_labels=labels)
+        P = Poset(H, element_labels=labels, cover_relations=True)
         return P
 
+    @cached_method
+    def _external_order_hasse_diagram(self):
+        r"""
+        Return the external passive sets of the independent sets, and the
+        Hasse diagram of the external order in its convex geometry orientation.
+
+        The external passive sets are the feasible sets of an antimatroid, so
+        the cover relations of the external order are exactly the pairs of
+        independent sets whose external passive sets differ by a single
+        element.  They are found by hashing the external passive sets, rather
+        than by comparing all pairs of independent sets.
+
+        OUTPUT:
+
+        A pair ``(ext_passives, H)``, where ``ext_passives`` is a dictionary
+        mapping each independent set to its set of externally passive
+        elements, and ``H`` is a ``DiGraph`` on the independent sets with an
+        edge from each independent set to each of its upper covers.
+        """
+        # independent sets keyed by the bitmasks of their external passives
+        indep_sets = {}
+        for (I, active) in self._activity_masks():
+            indep_sets[self._gs_mask & ~(active | I)] = I
+
+        ext_passives = {}
+        covers = {}
+        for (EP, I) in indep_sets.items():
+            I_set = self._unmask(I)
+            ext_passives[I_set] = self._unmask(EP)
+            upper_covers = []
+            for e in _bits(EP):
+                J = indep_sets.get(EP & ~(1 << e))
+                if J is not None:
+                    upper_covers.append(self._unmask(J))
+            covers[I_set] = upper_covers
+
+        H = DiGraph(covers, format='dict_of_lists')
+        return (ext_passives, H)
+
+    def _is_independent_mask(self, X):
+        return self._ground_matroid.is_independent(self._unmask(X))
+
+    def _external_passive_mask(self, I):
+        r"""
+        Return the bitmask of the externally passive elements of the
+        independent set with bitmask ``I``.
+        """
+        return self._gs_mask & ~(self._indep_activity_mask(I) | I)
+
+    def _external_upper_covers_mask(self, I, ext_passive=None):
+        r"""
+        Return the bitmasks of the upper covers of an independent set in the
+        convex geometry orientation of the external order, without
+        constructing the order.
+
+        Each cover of ``I`` removes a single element ``e`` from the external
+        passive set of ``I``, and the covering independent set is either
+        ``I + e`` or ``I + e - x`` for an element ``x`` of the fundamental
+        circuit of ``e``.  If ``I + e`` is independent, it is the only
+        independent set which can cover ``I`` by removing ``e``, so the sets
+        ``I + e - x`` are only tried when ``I + e`` is dependent, see
+        ``self._is_minimal_excluded`` for a reference.
+
+        INPUT:
+
+        - ``I`` -- the bitmask of an independent set
+
+        - ``ext_passive`` -- (default: ``None``) the bitmask of the externally
+          passive elements of ``I``, if already known
+        """
+        if ext_passive is None:
+            ext_passive = self._external_passive_mask(I)
+
+        covers = []
+        for e in _bits(ext_passive):
+            target = ext_passive & ~(1 << e)
+            J = I | 1 << e
+            if self._is_independent_mask(J):
+                candidates = [J]
+            else:
+                candidates = [J & ~(1 << x) for x in _bits(I)]
+            for J in candidates:
+                if (self._is_independent_mask(J)
+                        and self._external_passive_mask(J) == target):
+                    covers.append(J)
+                    break
+        return covers
+
+    def _external_order_complement(self, members):
+        r"""
+        Iterate over pairs ``(I, EP)`` of bitmasks of the independent sets
+        ``I`` not in ``members`` and their external passive sets ``EP``.
+        """
+        for (I, active) in self._activity_masks():
+            if I not in members:
+                yield (I, self._gs_mask & ~(active | I))
+
+    def _is_minimal_excluded(self, members, I, ext_passive):
+        r"""
+        Return whether the independent set ``I`` outside of ``members`` is
+        minimal among such sets in the antimatroid orientation of the
+        external order.
+
+        INPUT:
+
+        - ``members`` -- a container of bitmasks of independent sets which
+          forms a down-set of the external order in its antimatroid
+          orientation, such as the internal bases
+
+        - ``I`` -- the bitmask of an independent set not in ``members``
+
+        - ``ext_passive`` -- the bitmask of the externally passive elements
+          of ``I``
+
+        Since ``members`` is a down-set, an independent set outside of it is
+        minimal exactly when all of its lower covers lie in ``members``, so
+        each candidate is only tested against its lower covers and the order
+        itself is never constructed.
+
+        The internal bases of an ordered matroid form a down-set of the
+        antimatroid orientation of its external order, and so do the
+        external bases of an external zonotopal algebra in the external order
+        of its block matroid, see [Gillespie 2018].  The doctests of the
+        ``J_ideal_gens`` methods of the internal and external zonotopal
+        algebras check the resulting generators against the minimal elements
+        computed from the external order itself.
+
+        REFERENCES:
+
+        - [Gillespie 2018] B. Gillespie, *Convexity in ordered matroids and
+          the generalized external order*, PhD thesis, University of
+          California, Berkeley, 2018
+        """
+        # lower covers in the antimatroid orientation are upper covers in the
+        # convex geometry orientation
+        lower_covers = self._external_upper_covers_mask(I, ext_passive)
+        return all(J in members for J in lower_covers)
+
     def internal_order(self, variant="convex geometry",
                        representation="independent"):
         return self.dual().external_order(variant, representation)
 
+    def _internal_external_passive_masks(self):
+        r"""
+        Iterate over triples ``(S, EP, IP)`` of bitmasks of all subsets ``S``
+        of the groundset, their externally passive elements ``EP`` and their
+        internally passive elements ``IP``.
+
+        The subsets are enumerated by deciding for each element, from largest
+        to smallest, whether it lies in ``S`` or in its complement.  The
+        dominant basis of ``S`` and the dominant cobasis of its complement are
+        greedily built in the same order, so the flags of both are extended
+        incrementally along the way, and span engines are only copied when
+        they change.  Once both ``S`` is spanning and its complement is
+        cospanning, the remaining elements change neither flag, and the
+        remaining subsets are produced directly from the shared activities.
+        """
+        full = self._gs_mask
+        n = len(self._gs)
+
+        def passives(S, active, coactive):
+            return (S, full & ~(active | S), S & ~coactive)
+
+        stack = [(n, 0, self._span_engine(), self._cospan_engine(),
+                  self._loops_mask(), self._coloops_mask())]
+        while stack:
+            i, S, span, cospan, active, coactive = stack.pop()
+            if span.span_mask() == full and cospan.span_mask() == full:
+                # all subsets of the remaining elements share activities
+                lower = (1 << i) - 1
+                T = lower
+                while True:
+                    yield passives(S | T, active, coactive)
+                    if T == 0:
+                        break
+                    T = (T - 1) & lower
+                continue
+            if i == 0:
+                yield passives(S, active, coactive)
+                continue
+
+            x = i - 1
+            below = (1 << x) - 1
+            # x in the complement of S, extending the coflag
+            if cospan.span_mask() >> x & 1:
+                stack.append((x, S, span, cospan, active, coactive))
+            else:
+                child_cospan = cospan.copy()
+                newly_cospanned = child_cospan.add(x)
+                stack.append((x, S, span, child_cospan, active,
+                              coactive | (newly_cospanned & below)))
+            # x in S, extending the flag
+            if span.span_mask() >> x & 1:
+                stack.append((x, S | 1 << x, span, cospan, active, coactive))
+            else:
+                child_span = span.copy()
+                newly_spanned = child_span.add(x)
+                stack.append((x, S | 1 << x, child_span, cospan,
+                              active | (newly_spanned & below), coactive))
+
     def internal_external_order(self):
+        r"""
+        Return the internal/external order of this ordered matroid, on the
+        pairs of externally and internally passive sets of the subsets of the
+        groundset.
+
+        For a groundset of `n` elements, the subsets are enumerated in
+        `O(2^n)` steps, and the order has at most `2^n` elements.  Its cover
+        relations are extracted with bitsets indexed by the elements, using
+        `O(n 4^n / 64)` word operations.
+        """
         warn("Warning: Internal/external order constructor is currently "
              "experimental, and may give incorrect or nonsensical results.")
 
-        E = frozenset(self._gs)
+        full = self._gs_mask
+        n = len(self._gs)
 
+        # pack each pair of passive sets (EP, IP) into a single bitmask key,
+        # so that the order is given by containment of keys
         passives = {}
-        for S in Subsets(E):
-            S = frozenset(S)
-            EP = self.passive_elements(S) - S
-            IP = self.copassive_elements(E - S) & S
-            passives[S] = (EP, IP)
+        for (_, EP, IP) in self._internal_external_passive_masks():
+            passives[EP | (full & ~IP) << n] = (EP, IP)
 
         # TODO poset fails to be a lattice in simple cases... Is the
         # construction wrong?
 
-        # for S in Subsets(E):
-        #     S = frozenset(S)
-        #     EP = self.active_elements(S)
-        #     IP = self.coactive_elements(E - S)
-        #     passives[S] = (EP, IP)
-        #     print self._set_to_str(S)
-        #     print "a" + self._set_to_str(EP), "b" + self._set_to_str(IP)
-
+        # index keys by a linear extension, and record for each bit of the
+        # keys the bitset of indices of the keys containing it
+        keys = sorted(passives, key=lambda k: bin(k).count("1"))
+        N = len(keys)
+        containing = [0] * (2 * n)
+        for (j, k) in enumerate(keys):
+            for b in _bits(k):
+                containing[b] |= 1 << j
+
+        def strictly_above(j):
+            U = (1 << N) - 1
+            for b in _bits(keys[j]):
+                U &= containing[b]
+            # keys are distinct, so strictly larger keys have larger indices
+            return U & ~((1 << (j + 1)) - 1)
+
+        pairs = []
+        for k in keys:
+            EP, IP = passives[k]
+            pairs.append((self._unmask(EP), self._unmask(IP)))
+
+        # the upper covers of an element are its minimal strict upper bounds;
+        # the smallest index not above an already found cover is a cover
+        covers = {}
         labels = {}
-        for S in passives:
-            pS = passives[S]
-            str_ext = self._set_to_str(passives[S][0])
-            str_int = self._set_to_str(passives[S][1])
-            labels[pS] = str_ext + "/" + str_int
-
-        def int_ext_cmp(S, T):
-            return S[0].issubset(T[0]) and T[1].issubset(S[1])
-
-        P = LatticePoset(data=(passives.values(), int_ext_cmp),
-                         element_labels=labels)
+        for j in range(N):
+            remaining = strictly_above(j)
+            upper_covers = []
+            while remaining:
+                c = _low_bit(remaining)
+                upper_covers.append(pairs[c])
+                remaining &= ~strictly_above(c) & ~(1 << c)
+            pS = pairs[j]
+            covers[pS] = upper_covers
+            labels[pS] = self._set_to_str(pS[0]) + "/" \
+                + self._set_to_str(pS[1])
+
+        H = DiGraph(covers, format='dict_of_lists')
+        P = LatticePoset(H, element_labels=labels, cover_relations=True)
         return P
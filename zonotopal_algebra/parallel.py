@@ -0,0 +1,108 @@
+r"""
+Process pool helpers for distributing independent computations of a
+zonotopal algebra across several processes.
+
+Each worker process constructs its own copy of the zonotopal algebra once,
+and then evaluates a method of this copy on chunks of the work items.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from itertools import islice
+
+# the number of items per chunk when the number of items is unknown
+DEFAULT_CHUNK_SIZE = 256
+
+# the zonotopal algebra of the current worker process
+_worker_algebra = None
+
+
+def _initialize_worker(cls, args, kwds):
+    global _worker_algebra
+    _worker_algebra = cls(*args, **kwds)
+
+
+def _run_chunk(method, chunk):
+    return getattr(_worker_algebra, method)(chunk)
+
+
+def worker_pool(Z, workers):
+    r"""
+    Return a pool of ``workers`` processes, each holding its own copy of the
+    zonotopal algebra ``Z``, which can be passed to several calls of
+    ``parallel_chunks`` so that the copies and their cached data are reused.
+    """
+    return ProcessPoolExecutor(max_workers=workers,
+                               initializer=_initialize_worker,
+                               initargs=Z._constructor_data())
+
+
+def parallel_chunks(Z, method, items, workers, chunk_size=None, pool=None):
+    r"""
+    Apply a method of a zonotopal algebra to chunks of a collection of items
+    in a pool of worker processes.
+
+    INPUT:
+
+    - ``Z`` -- a zonotopal algebra
+
+    - ``method`` -- the name of a method of ``Z`` taking a list of items to a
+      list of results
+
+    - ``items`` -- an iterable of picklable items
+
+    - ``workers`` -- the number of worker processes
+
+    - ``chunk_size`` -- (default: ``None``) the number of items passed to the
+      method at a time.  If ``None``, the items are split into about four
+      chunks per worker if their number is known, and into chunks of
+      ``DEFAULT_CHUNK_SIZE`` items otherwise.
+
+    - ``pool`` -- (default: ``None``) a pool returned by ``worker_pool`` for
+      ``Z``.  If ``None``, a pool is started for this call only.
+
+    OUTPUT:
+
+    The concatenation of the lists of results of the chunks, in the order of
+    ``items``, so that the output does not depend on the scheduling of the
+    workers.
+
+    The items are consumed lazily, and chunks are submitted as they are
+    produced, with at most two chunks per worker waiting for their results,
+    so that only these chunks of ``items`` are held in memory.
+    """
+    if chunk_size is None:
+        if hasattr(items, "__len__"):
+            chunk_size = max(1, -(-len(items) // (4 * workers)))
+        else:
+            chunk_size = DEFAULT_CHUNK_SIZE
+    chunks = _chunks(items, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        return []
+    chunks = chain([first], chunks)
+    if pool is None:
+        with worker_pool(Z, workers) as pool:
+            return _map_chunks(pool, method, chunks, 2 * workers)
+    return _map_chunks(pool, method, chunks, 2 * workers)
+
+
+def _chunks(items, chunk_size):
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _map_chunks(pool, method, chunks, max_pending):
+    results = []
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(_run_chunk, method, chunk))
+        if len(pending) >= max_pending:
+            results.extend(pending.popleft().result())
+    while pending:
+        results.extend(pending.popleft().result())
+    return results
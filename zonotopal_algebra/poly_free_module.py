@@ -1,11 +1,18 @@
+from collections import OrderedDict
+from collections import deque
+from collections import namedtuple
+
 from sage.combinat.free_module import CombinatorialFreeModule
-from sage.matrix.constructor import Matrix
+from sage.misc.classcall_metaclass import typecall
+from sage.modules.free_module_element import vector
 from sage.rings.infinity import Infinity
 from sage.sets.set import Set
 from sage.structure.parent import Parent
 from sage.structure.unique_representation import UniqueRepresentation
 
 from .monomials import Monomials
+from .poly_span import PolynomialSpan
+from .poly_utils import _exponent_items
 
 
 class PolynomialFreeModuleElement(CombinatorialFreeModule.Element):
@@ -21,6 +28,23 @@ class PolynomialFreeModuleElement(CombinatorialFreeModule.Element):
         terms = [coeff * p for p, coeff in monom_coeffs.items()]
         return sum(terms)
 
+    def to_vector(self, new_base_ring=None, order=None, sparse=False):
+        r"""
+        Return the vector of coefficients of this element.  For a finite
+        ``Monomials`` basis, the positions of the monomials are computed by
+        ``Monomials.rank`` rather than by enumerating the basis.
+        """
+        basis = self.parent()._basis
+        if (new_base_ring is not None or order is not None
+                or not isinstance(basis, Monomials)
+                or basis.max_deg() == Infinity):
+            return super(PolynomialFreeModuleElement, self).to_vector(
+                new_base_ring=new_base_ring, order=order, sparse=sparse)
+        entries = dict((basis.rank(m), c)
+                       for (m, c) in self.monomial_coefficients().items())
+        return vector(self.parent().base_ring(), basis.cardinality(),
+                      entries, sparse=sparse)
+
 
 class PolynomialFreeModule(CombinatorialFreeModule, UniqueRepresentation,
                            Parent):
@@ -126,119 +150,279 @@ class PolynomialFreeModule(CombinatorialFreeModule, UniqueRepresentation,
     class _MonomialsConverter:
         def __init__(self, P, comb_mod, basis):
             self._poly_ring = P
-            self._monoms = Monomials(P)
             self._module = comb_mod
             self._basis = basis
 
-            # assert: all elements in basis are monomials
-            if type(self._basis) == list:
-                if len(self._basis) != len(set(self._basis)):
-                    raise ValueError(
-                        "Basis polynomials are not linearly independent")
+            # for a Monomials basis, membership is a degree check; otherwise
+            # index the basis monomials by their exponent tuples
+            if isinstance(self._basis, Monomials):
+                self._index = None
+            else:
+                self._index = {}
+                for b in self._basis:
+                    [(e, _)] = _exponent_items(self._poly_ring(b))
+                    if e in self._index:
+                        raise ValueError(
+                            "Basis polynomials are not linearly independent")
+                    self._index[e] = b
 
         def convert(self, p):
-            module_p = self._module.zero()
-            for exponent, coeff in p.dict().items():
-                monom = self._monoms[exponent]
-                if monom not in self._basis:
-                    raise ValueError(
-                        "Value %s is not spanned by the basis polynomials" % p)
-                module_p += coeff * self._module.monomial(monom)
-            return module_p
+            terms = {}
+            if self._index is None:
+                basis = self._basis
+                min_deg, max_deg = basis.min_deg(), basis.max_deg()
+                for (e, coeff) in _exponent_items(p):
+                    if not min_deg <= sum(e) <= max_deg:
+                        raise ValueError(
+                            "Value %s is not spanned by the basis polynomials"
+                            % p)
+                    terms[basis._monomial_from_degrees(e)] = coeff
+            else:
+                for (e, coeff) in _exponent_items(p):
+                    monom = self._index.get(e)
+                    if monom is None:
+                        raise ValueError(
+                            "Value %s is not spanned by the basis polynomials"
+                            % p)
+                    terms[monom] = coeff
+            return self._module._from_dict(terms, remove_zeros=False)
 
     class _FiniteBasisConverter:
         def __init__(self, P, comb_mod, basis):
             r"""
-            Basis should be a finite set of polynomials
+            Basis should be a finite set of polynomials.  The basis is
+            factored once into a ``PolynomialSpan``, which every conversion
+            reuses.
             """
             self._poly_ring = P
             self._module = comb_mod
             self._basis = basis
-
-            max_deg = max([self._poly_ring(b).degree() for b in self._basis])
-            monoms = []
-            for b in self._basis:
-                poly = self._poly_ring(b)
-                monoms += poly.monomials()
-            monoms_list = tuple(Set(monoms))
-
-            # check if the basis represented in terms of Monomials is efficient
-            degs = [self._poly_ring(m).degree() for m in monoms]
-            min_deg, max_deg = min(degs), max(degs)
-            monoms_obj = Monomials(self._poly_ring, (min_deg, max_deg + 1))
-
-            if monoms_obj.cardinality() < 2 * len(monoms_list):
-                computational_basis = monoms_obj
-            else:
-                computational_basis = monoms_list
-            self._monomial_module = PolynomialFreeModule(
-                P=self._poly_ring, basis=computational_basis)
-            cols = [self._monomial_module(b).to_vector() for b in self._basis]
-            self._basis_mat = Matrix(cols).transpose()
-            if self._basis_mat.ncols() > self._basis_mat.rank():
+            try:
+                self._span = PolynomialSpan(
+                    P, [self._poly_ring(b) for b in self._basis])
+            except ValueError:
                 raise ValueError(
                     "Basis polynomials are not linearly independent")
 
+        def _module_element(self, coeffs):
+            terms = dict((b, c) for (b, c) in zip(self._basis, coeffs) if c)
+            return self._module._from_dict(terms, remove_zeros=False)
+
         def convert(self, p):
             r"""
-            Algorithm is to convert all polynomials into monomials and use
-            linear algebra to solve for the appropriate coefficients in this
-            common basis.
+            Algorithm is to read off the coefficients of ``p`` at the pivot
+            monomials of the echelon form of the basis.
             """
-            try:
-                p_vect = self._monomial_module(p).to_vector()
-                decomp = self._basis_mat.solve_right(p_vect)
-            except ValueError:
-                raise ValueError(
-                    "Value %s is not spanned by the basis polynomials" % p)
-            polys = [v[1] * self._module.monomial(v[0])
-                     for v in zip(self._basis, decomp)]
-            module_p = sum(polys, self._module.zero())
-            return module_p
+            return self._module_element(self._span.coefficients(p))
+
+        def convert_many(self, polys):
+            return [self._module_element(coeffs)
+                    for coeffs in self._span.coefficients_many(polys)]
 
     class _InfiniteBasisConverter:
         def __init__(self, P, comb_mod, basis):
             self._poly_ring = P
             self._module = comb_mod
             self._basis = basis
-            # TODO implement some sort of caching for intermediate objects for
-            # conversion
+            # prefix of the basis with its factorization, which are extended
+            # by degree as polynomials of higher degree arrive, and the
+            # elements read from the basis but not yet added to the prefix
+            self._basis_iter = iter(self._basis)
+            self._prefix = []
+            self._span = PolynomialSpan(P)
+            self._pending = deque()
+
+        def _degree(self, b):
+            return self._poly_ring(b).degree()
+
+        def _extend(self, deg):
+            r"""
+            Extend the prefix of the basis by its elements up to the first
+            one of degree greater than ``deg``.
+
+            Elements are added to the span one at a time, and leave the
+            pending elements only once added, so that the prefix and the span
+            stay consistent if an element is invalid or dependent, and later
+            calls raise the same error again.
+            """
+            pending = self._pending
+            while not pending or self._degree(pending[-1]) <= deg:
+                try:
+                    pending.append(next(self._basis_iter))
+                except StopIteration:
+                    break
+            while pending and self._degree(pending[0]) <= deg:
+                b = pending[0]
+                try:
+                    self._span.extend([self._poly_ring(b)])
+                except ValueError:
+                    raise ValueError(
+                        "Basis polynomials are not linearly independent")
+                self._prefix.append(b)
+                pending.popleft()
 
         def convert(self, p):
-            # TODO check if polynomial is contained in span of basis in general
-            # for now assume that infinite basis is in increasing order of
-            # degree, and collect basis elements until the degree exceeds that
-            # of input polynomial.
-            # NOTE this is not necessarily a good heuristic without further
-            # processing of the basis beforehand; always works for homogeneous
-            # polynomials though
-            # TODO for now, what characteristics of the basis guarantee
-            # correctness here?
-            deg = p.degree()
-            fin_basis = []
-            it = iter(self._basis)
-            b = it.next()
-            while b.degree() <= deg:
-                fin_basis.append(b)
-                b = it.next()
-
-            C = PolynomialFreeModule._FiniteBasisConverter(
-                self._poly_ring, self._module, fin_basis)
-            return C.convert(p)
+            # NOTE this assumes that the infinite basis is in increasing order
+            # of degree, and collects basis elements until the degree exceeds
+            # that of the input polynomial; this always works for homogeneous
+            # polynomials
+            self._extend(p.degree())
+            coeffs = self._span.coefficients(p)
+            terms = dict((b, c) for (b, c) in zip(self._prefix, coeffs) if c)
+            return self._module._from_dict(terms, remove_zeros=False)
 
     def _element_constructor_(self, elt):
         return self.convert(elt)
 
     def convert(self, p):
+        return self._converter.convert(self._as_polynomial(p))
+
+    def convert_many(self, polys):
+        r"""
+        Return the list of elements of this module corresponding to the
+        polynomials ``polys``, sharing the work of the conversions where the
+        basis allows it.
+
+        EXAMPLES:
+
+            sage: P.<x> = PolynomialRing(QQ)
+            sage: M = PolynomialFreeModule(P, (1, x, x^2 + x))
+            sage: M.convert_many([1 + x^2, x])
+            [(1) - (x) + (x^2 + x), (x)]
+        """
+        polys = [self._as_polynomial(p) for p in polys]
+        if hasattr(self._converter, "convert_many"):
+            return self._converter.convert_many(polys)
+        return [self._converter.convert(p) for p in polys]
+
+    def _as_polynomial(self, p):
         if p not in self._poly_ring:
             raise ValueError("Value %s is not a polynomial in %s"
                              % (p, self._poly_ring))
         # ensure that the type of p is actually a polynomial
-        p = self._poly_ring(p)
-        return self._converter.convert(p)
+        return self._poly_ring(p)
 
     Element = PolynomialFreeModuleElement
 
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _ModuleCache:
+    r"""
+    Bounded least recently used cache of modules, keyed by a cheap
+    fingerprint of the polynomial ring and basis.  The stored basis is
+    compared in full before a module is shared, so colliding fingerprints
+    only cost a rebuild.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(P, basis):
+        if isinstance(basis, tuple):
+            return (P, len(basis), tuple(P(b).lm() for b in basis))
+        return (P, basis)
+
+    def get(self, key, basis):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == basis:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key, basis, module):
+        self._entries[key] = (basis, module)
+        self._entries.move_to_end(key)
+        self.evict()
+
+    def evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class LightPolynomialFreeModule(PolynomialFreeModule):
+    r"""
+    Class LightPolynomialFreeModule is a PolynomialFreeModule which is not
+    kept alive by the global cache of ``UniqueRepresentation``, so that
+    modules built for temporary bases can be garbage collected.
+
+    Modules are shared through a bounded least recently used cache instead,
+    keyed by the polynomial ring, the length of the basis and the leading
+    monomials of the basis polynomials.  Bases which are not a ``Monomials``
+    object or a finite list or tuple are never cached.
+
+    EXAMPLES:
+
+        sage: P.<x> = PolynomialRing(QQ)
+        sage: LightPolynomialFreeModule.cache_clear()
+        sage: M = LightPolynomialFreeModule(P, (1, x, x^2 + x))
+        sage: M is LightPolynomialFreeModule(P, (1, x, x^2 + x))
+        True
+        sage: M is LightPolynomialFreeModule(P, (1, x, x^2 - x))
+        False
+        sage: M(1 + x^2)
+        (1) - (x) + (x^2 + x)
+        sage: LightPolynomialFreeModule.cache_info()
+        CacheInfo(hits=1, misses=2, maxsize=128, currsize=1)
+    """
+    _cache = _ModuleCache(maxsize=128)
+
+    @staticmethod
+    def __classcall__(cls, P, basis=None):
+        if isinstance(basis, list):
+            basis = tuple(basis)
+        if basis is not None and not isinstance(basis, (tuple, Monomials)):
+            return cls._construct(P, basis)
+        key = _ModuleCache.fingerprint(P, basis)
+        module = cls._cache.get(key, basis)
+        if module is None:
+            module = cls._construct(P, basis)
+            cls._cache.put(key, basis, module)
+        return module
+
+    @classmethod
+    def _construct(cls, P, basis):
+        module = typecall(cls, P, basis)
+        # used by the pickling of ``UniqueRepresentation`` objects
+        module._reduction = (cls, (P, basis), {})
+        return module
+
+    @classmethod
+    def cache_info(cls):
+        r"""
+        Return the hits, misses, maximal size and current size of the cache
+        of modules.
+        """
+        return cls._cache.info()
+
+    @classmethod
+    def cache_clear(cls):
+        cls._cache.clear()
+
+    @classmethod
+    def set_cache_maxsize(cls, maxsize):
+        r"""
+        Set the maximal number of modules kept in the cache.
+        """
+        cls._cache.maxsize = maxsize
+        cls._cache.evict()
+
+
 # TODO allow conversions between elements of different modules over the same
 # polynomial space, and implement conversions/coercions
 
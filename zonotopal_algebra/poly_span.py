@@ -0,0 +1,143 @@
+r"""
+Sparse incremental echelon forms for the spans of lists of polynomials.
+
+Polynomials are stored as dictionaries from exponent tuples to coefficients,
+so that all polynomials of a span share the index of their monomials.
+"""
+
+from .poly_utils import _exponent_items
+
+
+def _subtract_multiple(target, c, source, zero):
+    r"""
+    Replace the dictionary ``target`` by ``target - c * source``, dropping
+    entries which become zero.
+    """
+    for (k, a) in source.items():
+        b = target.get(k, zero) - c * a
+        if b:
+            target[k] = b
+        else:
+            target.pop(k, None)
+
+
+class PolynomialSpan:
+    r"""
+    Class PolynomialSpan maintains the span of a list of linearly independent
+    polynomials in reduced echelon form over their monomials, together with
+    the transformation back to the given polynomials.
+
+    Each row of the echelon form has a pivot monomial with coefficient one at
+    which all other rows vanish.  The coefficients of a polynomial in the span
+    are therefore read off from its coefficients at the pivot monomials, and
+    the factorization is reused by every solve and extended in place when
+    further polynomials are added.
+
+    INPUT:
+
+    - ``P`` -- a polynomial ring
+    - ``polys`` -- (default: ``()``) a list of linearly independent
+      polynomials in ``P``
+
+    EXAMPLES:
+
+        sage: P.<x, y> = PolynomialRing(QQ)
+        sage: S = PolynomialSpan(P, [x + y, x - y, x^2])
+        sage: S.coefficients(3*x + y + 2*x^2)
+        [2, 1, 2]
+        sage: S.extend([x^2 + y])
+        Traceback (most recent call last):
+        ...
+        ValueError: PolynomialSpan: polynomials are not linearly independent
+        sage: S.coefficients(y^2)
+        Traceback (most recent call last):
+        ...
+        ValueError: Value y^2 is not spanned by the basis polynomials
+    """
+
+    def __init__(self, P, polys=()):
+        self._poly_ring = P
+        self._zero = P.base_ring().zero()
+        self._one = P.base_ring().one()
+        # pivot monomial -> row of the echelon form
+        self._rows = {}
+        # pivot monomial -> row in terms of the given polynomials
+        self._transforms = {}
+        self._size = 0
+        self.extend(polys)
+
+    def __len__(self):
+        return self._size
+
+    def polynomial_ring(self):
+        return self._poly_ring
+
+    def _reduce(self, row):
+        r"""
+        Reduce the dictionary ``row`` in place against the echelon form, and
+        return the list of pairs of pivots and the coefficients of ``row`` at
+        them, which are the multiples of the rows subtracted.
+        """
+        rows = self._rows
+        pivot_coeffs = [(m, c) for (m, c) in row.items() if m in rows]
+        for (m, c) in pivot_coeffs:
+            _subtract_multiple(row, c, rows[m], self._zero)
+        return pivot_coeffs
+
+    def extend(self, polys):
+        r"""
+        Add the polynomials ``polys`` to the span, after those already added.
+
+        A ``ValueError`` is raised if a polynomial is linearly dependent on
+        the polynomials before it.
+        """
+        zero = self._zero
+        for p in polys:
+            row = dict(_exponent_items(p))
+            pivot_coeffs = self._reduce(row)
+            if not row:
+                raise ValueError("PolynomialSpan: polynomials are not "
+                                 "linearly independent")
+            transform = {self._size: self._one}
+            for (m, c) in pivot_coeffs:
+                _subtract_multiple(transform, c, self._transforms[m], zero)
+
+            # normalize at the new pivot and eliminate it from the other rows
+            pivot = max(row)
+            inv = self._one / row[pivot]
+            row = dict((e, inv * a) for (e, a) in row.items())
+            transform = dict((j, inv * a) for (j, a) in transform.items())
+            for (m, other) in self._rows.items():
+                c = other.get(pivot)
+                if c:
+                    _subtract_multiple(other, c, row, zero)
+                    _subtract_multiple(self._transforms[m], c, transform,
+                                       zero)
+            self._rows[pivot] = row
+            self._transforms[pivot] = transform
+            self._size += 1
+
+    def coefficients(self, q):
+        r"""
+        Return the list of coefficients of the polynomial ``q`` in terms of
+        the polynomials of the span, in the order in which they were added.
+
+        A ``ValueError`` is raised if ``q`` is not in the span.
+        """
+        row = dict(_exponent_items(q))
+        pivot_coeffs = self._reduce(row)
+        if row:
+            raise ValueError(
+                "Value %s is not spanned by the basis polynomials" % q)
+        result = [self._zero] * self._size
+        for (m, c) in pivot_coeffs:
+            for (j, a) in self._transforms[m].items():
+                result[j] += c * a
+        return result
+
+    def coefficients_many(self, qs):
+        r"""
+        Return the lists of coefficients of each of the polynomials ``qs``,
+        as in ``coefficients``.
+        """
+        return [self.coefficients(q) for q in qs]
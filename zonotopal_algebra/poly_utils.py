@@ -1,9 +1,69 @@
-from sage.functions.other import factorial
+from collections import OrderedDict
+from functools import lru_cache
+
+from sage.arith.misc import binomial
 from sage.matrix.constructor import Matrix
 from sage.misc.misc_c import prod
+from sage.rings.polynomial.multi_polynomial_ring_base import \
+    MPolynomialRing_base
+
+
+# falling factorials b!/(b - a)! for 0 <= a <= b, extended on demand
+_falling_factorials = [[1]]
+
+
+def _falling_factorial_table(deg):
+    r"""
+    Return a table ``ff`` with ``ff[b][a]`` the falling factorial
+    `b (b - 1) \cdots (b - a + 1)` for all `0 \leq a \leq b \leq` ``deg``.
+    """
+    ff = _falling_factorials
+    for b in range(len(ff), deg + 1):
+        row = [1]
+        for a in range(1, b + 1):
+            row.append(row[-1] * (b - a + 1))
+        ff.append(row)
+    return ff
+
+
+def _exponent_items(p):
+    r"""
+    Return the list of pairs of exponent tuples and coefficients of ``p``.
+    """
+    items = p.dict().items()
+    if isinstance(p.parent(), MPolynomialRing_base):
+        return [(tuple(e), c) for (e, c) in items]
+    # univariate rings index exponents by integers rather than tuples
+    return [((e,), c) for (e, c) in items]
+
 
-from .monomials import Monomials
-from .poly_free_module import PolynomialFreeModule
+def _poly_deriv_items(p_items, q_items, ff):
+    r"""
+    Return the exponent dictionary of the derivative of a polynomial by a
+    differential operator, both given by their exponent items.
+
+    For each pair of terms `c x^a` of the operator and `d x^b` of the
+    polynomial with `a \leq b` componentwise, the term
+    `c d \prod_i b_i!/(b_i - a_i)! x^{b - a}` is accumulated, using the table
+    ``ff`` of falling factorials.
+    """
+    deriv = {}
+    for (a, c) in p_items:
+        for (b, d) in q_items:
+            coeff = c * d
+            e = []
+            for (ai, bi) in zip(a, b):
+                if ai > bi:
+                    break
+                coeff *= ff[bi][ai]
+                e.append(bi - ai)
+            else:
+                e = tuple(e)
+                if e in deriv:
+                    deriv[e] += coeff
+                else:
+                    deriv[e] = coeff
+    return {e: c for (e, c) in deriv.items() if c}
 
 
 def poly_deriv(p, q):
@@ -34,13 +94,52 @@ def poly_deriv(p, q):
         sage: poly_deriv(3*x^2, x^3 + x^2*y + x^2)
         18*x + 6*y + 6
     """
-    g = p.parent().gens()
+    return poly_deriv_many(p, [q])[0]
+
+
+def poly_deriv_many(p, qs):
+    r"""
+    The derivatives of a collection of polynomials by the polynomial p,
+    treating variables in p as corresponding partial differential operators.
+
+    The operator is decomposed into its terms once, and the derivatives are
+    computed directly on the exponents and coefficients of the polynomials.
+
+    INPUT:
+
+    - ``p`` -- a polynomial to act as a differential operator
+    - ``qs`` -- a list of polynomials in the same ring to be differentiated
+
+    OUTPUT:
+
+    - the list of the polynomial derivatives of the elements of ``qs`` by the
+      operator corresponding to ``p``
+
+    EXAMPLES:
+
+        sage: P.<x, y> = PolynomialRing(QQ)
+        sage: poly_deriv_many(x*y, [x^2*y^2, x + y, x*y + 1])
+        [4*x*y, 0, 1]
+    """
+    P = p.parent()
+    if not isinstance(P, MPolynomialRing_base):
+        # univariate rings index exponents by integers rather than tuples
+        return [_poly_deriv_univariate(p, q) for q in qs]
+    qs = [P(q) for q in qs]
+    p_items = _exponent_items(p)
+    q_items_list = [_exponent_items(q) for q in qs]
+    max_deg = max([max(e) for q_items in q_items_list
+                   for (e, _) in q_items] + [0])
+    ff = _falling_factorial_table(max_deg)
+    return [P(_poly_deriv_items(p_items, q_items, ff))
+            for q_items in q_items_list]
+
+
+def _poly_deriv_univariate(p, q):
+    g = p.parent().gen()
     s = p.parent().zero()
-    for e_tup, coeff in p.dict().items():
-        diff_list = []
-        for v, e in zip(g, e_tup):
-            diff_list.extend([v] * e)
-        s += coeff * q.derivative(diff_list)
+    for e, coeff in p.dict().items():
+        s += coeff * q.derivative([g] * e)
     return s
 
 
@@ -78,10 +177,104 @@ def diff_bilinear_form(p, q):
         sage: diff_bilinear_form(x + y^2, x + 2*y + y^2)
         3
     """
-    deriv_poly = poly_deriv(p, q)
-    n_vars = len(p.parent().gens())
-    zero = [0] * n_vars
-    return deriv_poly(zero)
+    return diff_bilinear_forms(p, [q])[0]
+
+
+@lru_cache(maxsize=2**16)
+def _factorial_weight(e):
+    r"""
+    Return the squared norm `\prod_i e_i!` of the monomial with exponent
+    tuple ``e`` under the differential bilinear form.
+    """
+    ff = _falling_factorial_table(max(e + (0,)))
+    return prod([ff[ei][ei] for ei in e])
+
+
+def diff_bilinear_forms(p, qs):
+    r"""
+    Return the differential bilinear forms `<p|q>` of ``p`` with each
+    polynomial ``q`` in ``qs``.
+
+    Since monomials are orthogonal with respect to the bilinear form, only
+    terms with equal exponents contribute, and the form is a dot product of
+    coefficients weighted by the squared norms of the common monomials.
+
+    INPUT:
+
+    - ``p`` -- a polynomial
+    - ``qs`` -- a list of polynomials in the same ring
+
+    OUTPUT:
+
+    - the list of the differential bilinear forms of p with the elements of
+      ``qs``
+
+    EXAMPLES:
+
+        sage: P.<x, y> = PolynomialRing(QQ)
+        sage: diff_bilinear_forms(x^2 + x*y, [x^2, x*y, 3*x^2 + y^2])
+        [2, 1, 6]
+    """
+    P = p.parent()
+    p_dict = dict(_exponent_items(p))
+    forms = []
+    for q in qs:
+        q_dict = dict(_exponent_items(P(q)))
+        if len(q_dict) < len(p_dict):
+            smaller, larger = q_dict, p_dict
+        else:
+            smaller, larger = p_dict, q_dict
+        form = P.base_ring().zero()
+        for (e, c) in smaller.items():
+            if e in larger:
+                form += c * larger[e] * _factorial_weight(e)
+        forms.append(form)
+    return forms
+
+
+def diff_bilinear_gram_matrix(P, ps, qs):
+    r"""
+    Return the matrix of differential bilinear forms `<p|q>` of the
+    polynomials ``p`` in ``ps`` with the polynomials ``q`` in ``qs``.
+
+    Both collections are mapped into a shared index of the monomials of
+    ``ps``, with the squared norms of the monomials applied to the first, and
+    the forms are computed as a single sparse matrix product.
+
+    INPUT:
+
+    - ``P`` -- a polynomial ring
+    - ``ps`` -- a list of polynomials in ``P``
+    - ``qs`` -- a list of polynomials in ``P``
+
+    OUTPUT:
+
+    - the matrix over the base ring of ``P`` whose ``(i, j)`` entry is the
+      differential bilinear form of ``ps[i]`` with ``qs[j]``
+
+    EXAMPLES:
+
+        sage: P.<x, y> = PolynomialRing(QQ)
+        sage: diff_bilinear_gram_matrix(P, [x^2, x + y], [x^2/2, x, y, x*y])
+        [1 0 0 0]
+        [0 1 1 0]
+    """
+    F = P.base_ring()
+    index = {}
+    p_entries = {}
+    for (i, p) in enumerate(ps):
+        for (e, c) in _exponent_items(P(p)):
+            k = index.setdefault(e, len(index))
+            p_entries[(i, k)] = c * _factorial_weight(e)
+    q_entries = {}
+    for (j, q) in enumerate(qs):
+        for (e, c) in _exponent_items(P(q)):
+            # monomials absent from ps do not contribute
+            if e in index:
+                q_entries[(j, index[e])] = c
+    A = Matrix(F, len(ps), len(index), p_entries, sparse=True)
+    B = Matrix(F, len(qs), len(index), q_entries, sparse=True)
+    return A * B.transpose()
 
 
 def linear_form(P, vec):
@@ -109,6 +302,65 @@ def linear_form(P, vec):
     return sum(terms, P.zero())
 
 
+def linear_form_power(P, vec, k):
+    r"""
+    Return a power of a linear form in the polynomial ring, expanded directly
+    from multinomial coefficients
+
+    INPUT:
+
+    - ``P`` -- a polynomial ring
+    - ``vec`` -- a list of coefficients
+    - ``k`` -- a nonnegative integer
+
+    OUTPUT:
+
+    - the ``k``-th power of the linear form ``linear_form(P, vec)``, computed
+      without intermediate polynomial multiplications
+
+    EXAMPLE:
+
+        sage: P.<x, y, z> = PolynomialRing(QQ)
+        sage: linear_form_power(P, [1, 2, 0], 3)
+        x^3 + 6*x^2*y + 12*x*y^2 + 8*y^3
+        sage: linear_form_power(P, [1, -1, 1], 2) == (x - y + z)^2
+        True
+    """
+    F = P.base_ring()
+    support = [i for (i, c) in enumerate(vec) if c]
+    if not support:
+        return P.one() if k == 0 else P.zero()
+    # powers[j][a] is the a-th power of the j-th nonzero coefficient
+    powers = []
+    for i in support:
+        c = F(vec[i])
+        row = [F.one()]
+        for _ in range(k):
+            row.append(row[-1] * c)
+        powers.append(row)
+
+    terms = {}
+    exps = [0] * P.ngens()
+    last = len(support) - 1
+
+    def expand(j, remaining, coeff):
+        # distribute the remaining degree among the variables support[j:],
+        # accumulating the multinomial coefficient as a product of binomials
+        if j == last:
+            exps[support[j]] = remaining
+            c = coeff * powers[j][remaining]
+            if c:
+                terms[tuple(exps)] = c
+            return
+        for a in range(remaining + 1):
+            exps[support[j]] = a
+            expand(j + 1, remaining - a,
+                   coeff * binomial(remaining, a) * powers[j][a])
+
+    expand(0, k, F.one())
+    return P(terms)
+
+
 def pure_tensor(P, vects, indices=None):
     r"""
     Return the product of a collection of linear forms corresponding to vectors
@@ -141,6 +393,68 @@ def pure_tensor(P, vects, indices=None):
     return prod(terms, P.one())
 
 
+class LinearFormProducts:
+    r"""
+    Class LinearFormProducts computes products of linear forms corresponding
+    to a fixed list of vectors, as in ``pure_tensor``, sharing common
+    sub-products between calls.
+
+    Products are keyed by the sorted tuple of their indices.  Each product is
+    obtained from the longest cached prefix of its key by multiplying in the
+    remaining linear forms one at a time, caching every intermediate prefix,
+    so that the cached products form a tree in which each product costs one
+    multiplication beyond its parent.  The cache holds at most ``maxsize``
+    products, evicting the least recently used.
+
+    INPUT:
+
+    - ``P`` -- a polynomial ring
+    - ``vects`` -- a list of coefficient vectors
+    - ``maxsize`` -- (default: ``1024``) the maximum number of cached products
+
+    EXAMPLES:
+
+        sage: P.<x, y> = PolynomialRing(QQ)
+        sage: products = LinearFormProducts(P, [[1,0],[0,1],[1,1]])
+        sage: products([2, 0, 2]).factor()
+        x * (x + y)^2
+        sage: products([0, 1]) == pure_tensor(P, [[1,0],[0,1],[1,1]], [0, 1])
+        True
+        sage: products()
+        x^2*y + x*y^2
+    """
+
+    def __init__(self, P, vects, maxsize=1024):
+        self._poly_ring = P
+        self._forms = [linear_form(P, v) for v in vects]
+        self._maxsize = maxsize
+        self._cache = OrderedDict()
+
+    def __call__(self, indices=None):
+        if indices is None:
+            indices = range(len(self._forms))
+        key = tuple(sorted(indices))
+        cache = self._cache
+
+        # find the longest cached prefix of the key
+        k = len(key)
+        while k > 0 and key[:k] not in cache:
+            k -= 1
+        if k > 0:
+            p = cache[key[:k]]
+            cache.move_to_end(key[:k])
+        else:
+            p = self._poly_ring.one()
+
+        # extend the product by the remaining linear forms
+        for j in range(k, len(key)):
+            p = p * self._forms[key[j]]
+            cache[key[:j + 1]] = p
+            if len(cache) > self._maxsize:
+                cache.popitem(last=False)
+        return p
+
+
 def poly_dual_basis(P, poly_basis):
     r"""
     Return a collection of polynomials which are dual under the differential
@@ -168,21 +482,9 @@ def poly_dual_basis(P, poly_basis):
     """
     # recast poly_basis to ensure elements are all from P
     poly_basis = [P(p) for p in poly_basis]
-    # compute max degree of basis polynomials for linear algebra computations
-    deg = max([p.degree() for p in poly_basis])
-    # construct polynomial free module for linear algebra computations
-    monoms = Monomials(P, (0, deg))
-    poly_module = PolynomialFreeModule(P, basis=monoms)
-    # compute the values of the bilinear form <m|m> for basis monomials m
-    bilinear_form_coeffs = []
-    for b in poly_module.basis().keys():
-        # each b is a monomial in P of degree at most deg
-        b = P(b)
-        bilinear_form_coeffs.append(prod(map(factorial, b.degrees())))
-    # compute dual basis
-    A = Matrix([poly_module(p).to_vector() for p in poly_basis])
-    D = Matrix.diagonal(bilinear_form_coeffs, sparse=False)
-    B = (A * D * A.transpose()).inverse()
+    # compute the Gram matrix of the bilinear form over the monomials
+    # occurring in the basis polynomials, and invert it
+    B = diff_bilinear_gram_matrix(P, poly_basis, poly_basis).inverse()
     # reconstruct dual basis polynomials from corresponding vectors
     dual_basis = []
     for col in B.columns():